@@ -13,8 +13,10 @@
     'category': 'Technical',
     'version': '1.1',
 
-    'depends': ['base', 'sale', 'stock'],
+    'depends': ['base', 'sale', 'stock', 'sale_stock'],
     'data': [
+        'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/fields.xml',
         'views/payment_ref.xml',
     ],
@@ -0,0 +1,63 @@
+# /controllers/metrics.py
+
+import hmac
+
+from odoo import http
+from odoo.http import request
+
+from ..models.webhook_metrics import metrics, format_labels
+
+
+class WebhookMetricsController(http.Controller):
+
+    @http.route('/chimkins/metrics', type='http', auth='none', methods=['GET'], csrf=False, save_session=False)
+    def webhook_metrics(self, token=None, **kwargs):
+        """Prometheus scrape endpoint for the WooCommerce sync pipeline.
+
+        Disabled unless the ``webhook_metrics_token`` system parameter is set;
+        the token is passed as ``?token=`` or as a Bearer Authorization header.
+        Counters and histograms are totals flushed to the database by every
+        worker, including the cron workers that deliver webhooks and never
+        answer HTTP; the answering worker flushes its own increments first.
+        The queue gauges are read from the database as well.
+        """
+        env = request.env(su=True)
+        expected = env['ir.config_parameter'].get_param('webhook_metrics_token', default='')
+        if not token:
+            auth_header = request.httprequest.headers.get('Authorization', '')
+            if auth_header.startswith('Bearer '):
+                token = auth_header[len('Bearer '):]
+        if not expected or not token or not hmac.compare_digest(token, expected):
+            return request.not_found()
+
+        metrics.flush(env.cr)
+        body = metrics.render(env.cr) + self._render_gauges(env)
+        return request.make_response(body, headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')])
+
+    def _render_gauges(self, env):
+        cr = env.cr
+        lines = [
+            "# HELP chimkins_stock_outbox_rows Stock webhook outbox rows, by state.",
+            "# TYPE chimkins_stock_outbox_rows gauge",
+        ]
+        cr.execute("SELECT state, count(*) FROM stock_webhook_outbox WHERE state != 'sent' GROUP BY state")
+        counts = dict(cr.fetchall())
+        for state in ('pending', 'processing', 'failed'):
+            lines.append(f"chimkins_stock_outbox_rows{format_labels((('state', state),))} {counts.get(state, 0)}")
+
+        cr.execute("""
+            SELECT COALESCE(EXTRACT(EPOCH FROM (now() at time zone 'UTC') - MIN(create_date)), 0)
+              FROM stock_webhook_outbox WHERE state IN ('pending', 'processing')
+        """)
+        lines += [
+            "# HELP chimkins_stock_outbox_oldest_age_seconds Age of the oldest undelivered stock change.",
+            "# TYPE chimkins_stock_outbox_oldest_age_seconds gauge",
+            f"chimkins_stock_outbox_oldest_age_seconds {cr.fetchone()[0]}",
+            "# HELP chimkins_webhook_circuit_open Whether the circuit breaker of an endpoint is open (1) or half-open (0.5).",
+            "# TYPE chimkins_webhook_circuit_open gauge",
+        ]
+        cr.execute("SELECT url, state FROM webhook_endpoint ORDER BY url")
+        for url, state in cr.fetchall():
+            value = {'open': 1, 'half_open': 0.5}.get(state, 0)
+            lines.append(f"chimkins_webhook_circuit_open{format_labels((('url', url),))} {value}")
+        return '\n'.join(lines) + '\n'
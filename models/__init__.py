@@ -7,6 +7,18 @@ from . import confirm_sale_order
 from . import create_invoice
 from . import back_to_draft
 from . import register_payment
+from . import process_paid_order
 from . import hold_state
 from . import custom_fields
 from . import stock_update
+from . import webhook_outbox_mixin
+from . import stock_webhook_outbox
+from . import completion_webhook_outbox
+from . import stock_webhook_snapshot
+from . import chunked_job_mixin
+from . import stock_webhook_resync
+from . import product_availability_backfill
+from . import webhook_endpoint
+from . import webhook_metrics
+from . import rpc_idempotency
+from . import rpc_job
@@ -9,7 +9,14 @@ class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
     @api.model
-    def reset_order_by_id(self, sale_order_id):
+    def reset_order_by_id(self, sale_order_id, idempotency_key=None):
+        return self.env['woocommerce.rpc.idempotency']._call_once(
+            'reset_order_by_id', idempotency_key, [sale_order_id],
+            lambda: self._reset_order_by_id(sale_order_id),
+        )
+
+    @api.model
+    def _reset_order_by_id(self, sale_order_id):
         try:
             sale_order = self.browse(sale_order_id)
             if not sale_order.exists():
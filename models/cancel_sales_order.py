@@ -1,6 +1,6 @@
 # /models/sale_order.py
 
-from odoo import models, api, _
+from odoo import models, api, exceptions, _
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -9,7 +9,14 @@ class SaleOrder(models.Model):
     _inherit = "sale.order"
 
     @api.model
-    def cancel_woocommerce_sales_order(self, wc_order_id):
+    def cancel_woocommerce_sales_order(self, wc_order_id, idempotency_key=None):
+        return self.env['woocommerce.rpc.idempotency']._call_once(
+            'cancel_woocommerce_sales_order', idempotency_key, [wc_order_id],
+            lambda: self._cancel_woocommerce_sales_order(wc_order_id),
+        )
+
+    @api.model
+    def _cancel_woocommerce_sales_order(self, wc_order_id):
         try:
             sale_order = self.search([('woocommerce_order_id', '=', wc_order_id)], limit=1)
             if not sale_order:
@@ -87,3 +94,98 @@ class SaleOrder(models.Model):
                 'woocommerce_order_id': wc_order_id,
                 'sale_order_id': None
             }
+
+    @api.model
+    def cancel_woocommerce_sales_orders(self, wc_order_ids):
+        """Cancel the Sales Orders of many WooCommerce orders in one call.
+
+        The orders are found with one search on the indexed
+        ``woocommerce_order_id``; their open pickings are cancelled by one
+        ``action_cancel`` and the orders by another, under a savepoint. After
+        a failure the orders are cancelled individually instead, and every
+        result matches what ``cancel_woocommerce_sales_order`` returns.
+        """
+        wc_order_ids = [str(wc_order_id) for wc_order_id in wc_order_ids]
+        orders_by_wc_id = {}
+        for order in self.search([('woocommerce_order_id', 'in', wc_order_ids)], order='id'):
+            orders_by_wc_id.setdefault(order.woocommerce_order_id, order)
+
+        results = {}
+        to_cancel = self.browse()
+        for wc_order_id in wc_order_ids:
+            sale_order = orders_by_wc_id.get(wc_order_id)
+            if not sale_order:
+                msg = _("No Sales Order found for WooCommerce Order ID %s.") % wc_order_id
+                _logger.error(msg)
+                results[wc_order_id] = {
+                    'success': False,
+                    'message': msg,
+                    'log_message': msg,
+                    'woocommerce_order_id': wc_order_id,
+                    'sale_order_id': None
+                }
+            elif sale_order.state not in ['draft', 'sent', 'sale']:
+                msg = _("Sales Order %s is not in a cancellable state.") % sale_order.name
+                _logger.warning(msg)
+                results[wc_order_id] = {
+                    'success': False,
+                    'message': msg,
+                    'log_message': msg,
+                    'woocommerce_order_id': sale_order.woocommerce_order_id or '',
+                    'sale_order_id': sale_order.id
+                }
+            else:
+                to_cancel |= sale_order
+
+        if to_cancel:
+            try:
+                with self.env.cr.savepoint():
+                    to_cancel._cancel_with_pickings()
+                for sale_order in to_cancel:
+                    log_message = _("Sales Order %s has been cancelled.") % sale_order.name
+                    results[sale_order.woocommerce_order_id] = {
+                        'success': True,
+                        'message': "Sales Order cancelled successfully.",
+                        'log_message': log_message,
+                        'woocommerce_order_id': sale_order.woocommerce_order_id or '',
+                        'sale_order_id': sale_order.id
+                    }
+                _logger.info(f"{len(to_cancel)} Sales Orders have been cancelled.")
+            except Exception as e:
+                _logger.warning(f"Bulk cancellation of {len(to_cancel)} Sales Orders failed ({e}), retrying per order")
+                for sale_order in to_cancel:
+                    results[sale_order.woocommerce_order_id] = self._cancel_woocommerce_sales_order_isolated(
+                        sale_order.woocommerce_order_id)
+
+        results = [results[wc_order_id] for wc_order_id in wc_order_ids]
+        succeeded = sum(1 for result in results if result['success'])
+        log_message = _("Cancelled %s of %s Sales Orders.") % (succeeded, len(results))
+        return {
+            'success': succeeded == len(results),
+            'message': log_message,
+            'log_message': log_message,
+            'results': results,
+        }
+
+    def _cancel_with_pickings(self):
+        self.picking_ids.filtered(lambda p: p.state not in ['cancel', 'done']).action_cancel()
+        self.action_cancel()
+        not_cancelled = self.filtered(lambda so: so.state != 'cancel')
+        if not_cancelled:
+            _logger.warning(f"Sales Orders {', '.join(not_cancelled.mapped('name'))} not fully canceled. "
+                            f"Forcing state to cancel.")
+            not_cancelled.write({'state': 'cancel'})
+
+    @api.model
+    def _cancel_woocommerce_sales_order_isolated(self, wc_order_id):
+        def error_result(e):
+            _logger.exception(f"Unexpected error canceling Sales Order for WC Order ID {wc_order_id}: {e}")
+            return {
+                'success': False,
+                'message': str(e),
+                'log_message': str(e),
+                'woocommerce_order_id': wc_order_id,
+                'sale_order_id': None
+            }
+
+        return call_in_savepoint(self.env, lambda: self.cancel_woocommerce_sales_order(wc_order_id), error_result)
@@ -0,0 +1,139 @@
+# /models/chunked_job_mixin.py
+
+import logging
+import threading
+import time
+
+from odoo import models, fields, api
+
+from .webhook_metrics import metrics
+
+_logger = logging.getLogger(__name__)
+
+
+class ChunkedJobMixin(models.AbstractModel):
+    """Background job walking the product catalog in id order, one page at a time.
+
+    Each page is processed, checkpointed (``last_product_id``) and committed.
+    A run stops when its time budget is spent and the job's cron resumes it
+    after the checkpoint. Models set the cron xmlid and the page size / time
+    budget parameters, and implement ``_count_total``, ``_fetch_page`` and
+    ``_process_page``.
+    """
+    _name = 'chunked.job.mixin'
+    _description = 'Chunked Catalog Job'
+    _order = 'id desc'
+
+    _job_cron_xmlid = None
+    _job_page_size_param = None
+    _job_time_budget_param = None
+    _job_label = 'Catalog job'
+
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancel', 'Cancelled'),
+    ], string='State', default='pending', required=True, index=True)
+    last_product_id = fields.Integer(string='Last Product ID', default=0)
+    processed_count = fields.Integer(string='Processed Products', default=0)
+    total_count = fields.Integer(string='Total Products', default=0)
+    started_at = fields.Datetime(string='Started On')
+    finished_at = fields.Datetime(string='Finished On')
+    last_error = fields.Text(string='Last Error')
+
+    @api.model
+    def _get_cron(self):
+        return self.env.ref(f'{self._module}.{self._job_cron_xmlid}', raise_if_not_found=False)
+
+    @api.model
+    def _queue_job(self):
+        """Return the queued or running job, creating one if needed, and wake the cron.
+
+        Only users allowed to create jobs of this model may queue one; the
+        job itself is then written as superuser."""
+        self.check_access_rights('create')
+        job = self.sudo().search([('state', 'in', ['pending', 'running'])], limit=1)
+        if not job:
+            job = self.sudo().create({'total_count': self._count_total()})
+            _logger.info(f"{self._job_label} {job.id} queued for {job.total_count} products")
+        cron = self._get_cron()
+        if cron:
+            cron.sudo()._trigger()
+        return job
+
+    def action_cancel(self):
+        self.filtered(lambda job: job.state in ('pending', 'running')).write({'state': 'cancel'})
+
+    @api.model
+    def _cron_run(self):
+        job = self.search([('state', 'in', ['pending', 'running'])], order='id', limit=1)
+        if job:
+            job._run()
+
+    @api.model
+    def _count_total(self):
+        raise NotImplementedError()
+
+    def _open_pages(self):
+        """Prepare reading pages after ``last_product_id``."""
+
+    def _close_pages(self):
+        """Release what ``_open_pages`` prepared."""
+
+    def _fetch_page(self, page_size):
+        """Return the ids of the next page of products, empty when done."""
+        raise NotImplementedError()
+
+    def _process_page(self, product_ids):
+        """Process one page; return False to pause the job until the next scheduled run."""
+        raise NotImplementedError()
+
+    def _run(self):
+        self.ensure_one()
+        ICP = self.env['ir.config_parameter'].sudo()
+        page_size = max(int(ICP.get_param(self._job_page_size_param, default=1000)), 1)
+        time_budget = int(ICP.get_param(self._job_time_budget_param, default=240))
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        deadline = time.monotonic() + time_budget
+
+        if self.state == 'pending':
+            self.write({'state': 'running', 'started_at': fields.Datetime.now()})
+
+        paused = False
+        cr = self.env.cr
+        self._open_pages()
+        try:
+            while time.monotonic() < deadline:
+                product_ids = self._fetch_page(page_size)
+                if not product_ids:
+                    self.write({'state': 'done', 'finished_at': fields.Datetime.now(), 'last_error': False})
+                    _logger.info(f"{self._job_label} {self.id} finished: {self.processed_count} products")
+                    break
+                if not self._process_page(product_ids):
+                    _logger.warning(f"{self._job_label} {self.id} paused at product {self.last_product_id}")
+                    paused = True
+                    break
+
+                self.write({
+                    'last_product_id': product_ids[-1],
+                    'processed_count': self.processed_count + len(product_ids),
+                    'last_error': False,
+                })
+                _logger.info(f"{self._job_label} {self.id}: {self.processed_count}/{self.total_count} products")
+                if auto_commit:
+                    metrics.flush_after_commit(self.env, force=True)
+                    cr.commit()
+                self.env.invalidate_all()
+        except Exception:
+            cr.rollback()
+            raise
+        finally:
+            self._close_pages()
+
+        # Continue right away when only the time budget ran out; after a
+        # pause, wait for the next scheduled run.
+        if self.state == 'running' and not paused:
+            cron = self._get_cron()
+            if cron:
+                cron.sudo()._trigger()
@@ -0,0 +1,202 @@
+# /models/completion_webhook_outbox.py
+
+from datetime import timedelta
+import logging
+
+import requests
+
+from odoo import models, fields, api
+from odoo.tools.sql import column_exists, table_exists
+
+from .webhook_dispatcher import post_webhook
+from .webhook_metrics import metrics
+
+_logger = logging.getLogger(__name__)
+
+
+class WooCommerceCompletionOutbox(models.Model):
+    """Order-completed statuses waiting to be sent to WooCommerce.
+
+    Rows are written in the transaction that validates the last delivery of
+    an order, so nothing is sent for a validation that rolls back and the
+    warehouse user never waits on the shop. The cron sends them after commit,
+    retries failures with exponential backoff, and marks the order's
+    pickings ``woocommerce_webhook_sent`` only once WooCommerce acknowledged.
+
+    There is at most one queued row per WooCommerce order (partial unique
+    index on pending and processing rows).
+
+    With ``webhook_change_status_bulk`` set, rows wait
+    ``webhook_change_status_window`` seconds (default 5) so that a wave or
+    batch validation is collected, and each claimed batch is sent as one
+    request whose ``orders`` list carries the usual per-order status.
+
+    Lease, batch size and retry limit come from the
+    ``webhook_change_status_*`` parameters (see webhook.outbox.mixin), so
+    they are tuned independently of the stock outbox.
+    """
+    _name = 'woocommerce.completion.outbox'
+    _inherit = 'webhook.outbox.mixin'
+    _description = 'WooCommerce Completion Webhook Outbox'
+
+    _outbox_cron_xmlid = 'ir_cron_woocommerce_completion_outbox'
+    _outbox_url_param = 'webhook_change_status'
+    _outbox_param_prefix = 'webhook_change_status'
+
+    picking_id = fields.Many2one('stock.picking', string='Picking', required=True, ondelete='cascade')
+    woocommerce_order_id = fields.Char(string='WooCommerce Order ID', required=True)
+
+    def _auto_init(self):
+        """When the outbox is first created, mark deliveries that were already
+        done as sent, so the parked sweep does not report years of history."""
+        if not table_exists(self.env.cr, self._table) \
+                and column_exists(self.env.cr, 'stock_picking', 'woocommerce_webhook_sent'):
+            self.env.cr.execute("""
+                UPDATE stock_picking
+                   SET woocommerce_webhook_sent = true
+                 WHERE woocommerce_order_id IS NOT NULL
+                   AND woocommerce_webhook_sent IS NOT TRUE
+                   AND state = 'done'
+            """)
+            _logger.info("Marked %s delivered pickings as already reported to WooCommerce.", self.env.cr.rowcount)
+        return super()._auto_init()
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS woocommerce_completion_outbox_queued_order_uniq
+                ON woocommerce_completion_outbox (woocommerce_order_id) WHERE state IN ('pending', 'processing')
+        """)
+
+    @api.model
+    def _enqueue(self, pickings):
+        """Queue the completed status of the WooCommerce orders of these pickings."""
+        pickings = pickings.filtered('woocommerce_order_id')
+        if not pickings:
+            return
+        if not self._get_outbox_url():
+            _logger.warning("No return URL found for webhook. Webhook not sent.")
+            return
+        next_attempt = fields.Datetime.now()
+        if self._is_bulk():
+            next_attempt += timedelta(seconds=self._get_bulk_window())
+        self.env.cr.execute("""
+            INSERT INTO woocommerce_completion_outbox (picking_id, woocommerce_order_id, state, attempts, next_attempt,
+                                                       create_date, write_date, create_uid, write_uid)
+            SELECT v.picking_id, v.woocommerce_order_id, 'pending', 0, %(next_attempt)s,
+                   %(now)s, %(now)s, %(uid)s, %(uid)s
+              FROM unnest(%(picking_ids)s::int[], %(order_ids)s::varchar[]) AS v(picking_id, woocommerce_order_id)
+            ON CONFLICT (woocommerce_order_id) WHERE state IN ('pending', 'processing') DO NOTHING
+        """, {
+            'now': fields.Datetime.now(),
+            'next_attempt': next_attempt,
+            'uid': self.env.uid,
+            'picking_ids': pickings.ids,
+            'order_ids': pickings.mapped('woocommerce_order_id'),
+        })
+        if self.env.cr.rowcount:
+            cron = self._get_cron()
+            if cron:
+                cron.sudo()._trigger(at=next_attempt)
+
+    @api.model
+    def _is_bulk(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return ICP.get_param('webhook_change_status_bulk', default='') in ('1', 'True', 'true')
+
+    @api.model
+    def _get_bulk_window(self):
+        """Seconds during which completions are collected into one bulk request."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        return max(int(ICP.get_param('webhook_change_status_window', default=5)), 0)
+
+    @api.model
+    def _check_outbox_config(self, url):
+        if not url or not self.env['ir.config_parameter'].sudo().get_param('webhook_api_key', default=''):
+            _logger.warning("Completion webhook URL or API key is not configured; statuses stay queued.")
+            return False
+        return True
+
+    def _deliver(self):
+        max_attempts = self._get_outbox_setting('max_attempts', 10)
+        url = self._get_outbox_url()
+
+        sent, failed = self._deliver_bulk(url) if self._is_bulk() else self._deliver_each(url)
+
+        if sent:
+            sent._mark_sent()
+        for row, error in failed.items():
+            attempts = row.attempts + 1
+            row.write({
+                'state': 'failed' if attempts >= max_attempts else 'pending',
+                'attempts': attempts,
+                'next_attempt': fields.Datetime.now() + timedelta(seconds=min(30 * 2 ** row.attempts, 3600)),
+                'last_error': error,
+            })
+        if failed:
+            _logger.warning(f"Completion outbox delivery failed for {len(failed)} orders")
+
+    def _deliver_each(self, url):
+        """One request per order. Returns the sent rows and an error per failed row."""
+        Endpoint = self.env['webhook.endpoint'].sudo()
+        sent = self.browse()
+        failed = {}
+        for index, row in enumerate(self):
+            if Endpoint._is_open(url):
+                # The circuit opened mid-batch: leave the rest for later without using up an attempt
+                self[index:].write({'state': 'pending', 'next_attempt': fields.Datetime.now()})
+                break
+            try:
+                delivered = row.picking_id._send_woocommerce_webhook()
+                error = False if delivered else "Webhook endpoint did not acknowledge the status."
+            except Exception as e:
+                _logger.exception(f"Completion outbox delivery error: {e}")
+                delivered, error = False, str(e)
+            if delivered:
+                sent |= row
+            else:
+                failed[row] = error
+        return sent, failed
+
+    def _deliver_bulk(self, url):
+        """One request for all these orders. Returns the sent rows and an error per failed row."""
+        try:
+            if self._send_bulk_webhook(url):
+                return self, {}
+            error = "Webhook endpoint did not acknowledge the statuses."
+        except Exception as e:
+            _logger.exception(f"Completion outbox bulk delivery error: {e}")
+            error = str(e)
+        return self.browse(), dict.fromkeys(self, error)
+
+    def _send_bulk_webhook(self, url):
+        """Send the statuses of all these rows' orders in one request."""
+        api_key = self.env['ir.config_parameter'].sudo().get_param('webhook_api_key', default='')
+        payload = {
+            'orders': [row.picking_id._prepare_woocommerce_completion_entry() for row in self],
+            'api_key': api_key,
+        }
+        Endpoint = self.env['webhook.endpoint'].sudo()
+        try:
+            _logger.info(f"Sending bulk webhook for {len(self)} WooCommerce orders.")
+            with metrics.timer('chimkins_webhook_request_seconds', webhook='change_status'):
+                response = post_webhook(url, payload, timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            _logger.error(f"Failed to send bulk webhook for {len(self)} WooCommerce orders: {e}")
+            metrics.inc('chimkins_webhook_requests_total', webhook='change_status', result='failed')
+            Endpoint._record_failure(url, str(e))
+            return False
+        metrics.inc('chimkins_webhook_requests_total', webhook='change_status', result='sent')
+        Endpoint._record_success(url)
+        return True
+
+    def _mark_sent(self):
+        """Record WooCommerce's acknowledgement on the rows and on every
+        delivery of their orders."""
+        self.write({'state': 'sent', 'sent_date': fields.Datetime.now(), 'last_error': False})
+        self.env['stock.picking'].search([
+            ('woocommerce_order_id', 'in', self.mapped('woocommerce_order_id')),
+            ('picking_type_id.code', 'in', ['outgoing', 'direct']),
+            ('woocommerce_webhook_sent', '=', False),
+        ]).write({'woocommerce_webhook_sent': True})
+        _logger.info(f"Completion outbox delivered {len(self)} order statuses")
@@ -9,7 +9,16 @@ class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
     @api.model
-    def confirm_order_by_id(self, sale_order_id, order_date=None):
+    def confirm_order_by_id(self, sale_order_id, order_date=None, idempotency_key=None, run_async=False,
+                            callback_url=None):
+        return self.env['woocommerce.rpc.idempotency']._call_once(
+            'confirm_order_by_id', idempotency_key, [sale_order_id, order_date, run_async, callback_url],
+            lambda: self.env['woocommerce.rpc.job']._run_or_enqueue(
+                self, 'confirm_order_by_id', [sale_order_id], {'order_date': order_date}, run_async, callback_url),
+        )
+
+    @api.model
+    def _confirm_order_by_id(self, sale_order_id, order_date=None):
         try:
             sale_order = self.browse(sale_order_id)
             if not sale_order.exists():
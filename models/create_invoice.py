@@ -3,6 +3,8 @@
 from odoo import models, api, exceptions, _, fields
 import logging
 
+from .rpc_savepoint import call_in_savepoint
+
 _logger = logging.getLogger(__name__)
 
 class SaleOrder(models.Model):
@@ -22,17 +24,28 @@ class SaleOrder(models.Model):
         if not invoices:
             raise exceptions.UserError(_("No invoices were created."))
         if invoice_date:
-            try:
-                invoice_date_value = fields.Date.to_date(invoice_date)
-            except Exception:
-                invoice_date_value = fields.Date.context_today(self)
-            invoices.filtered(lambda inv: inv.state == 'draft').write({'invoice_date': invoice_date_value})
+            invoices.filtered(lambda inv: inv.state == 'draft').write({'invoice_date': self._parse_invoice_date(invoice_date)})
 
         invoices.action_post()
         return invoices.ids
 
+    def _parse_invoice_date(self, invoice_date):
+        try:
+            return fields.Date.to_date(invoice_date)
+        except Exception:
+            return fields.Date.context_today(self)
+
+    @api.model
+    def create_invoice_by_order_id(self, sale_order_id, invoice_date=None, idempotency_key=None, run_async=False,
+                                   callback_url=None):
+        return self.env['woocommerce.rpc.idempotency']._call_once(
+            'create_invoice_by_order_id', idempotency_key, [sale_order_id, invoice_date, run_async, callback_url],
+            lambda: self.env['woocommerce.rpc.job']._run_or_enqueue(
+                self, 'create_invoice_by_order_id', [sale_order_id], {'invoice_date': invoice_date}, run_async, callback_url),
+        )
+
     @api.model
-    def create_invoice_by_order_id(self, sale_order_id, invoice_date=None):
+    def _create_invoice_by_order_id(self, sale_order_id, invoice_date=None):
         order = self.browse(sale_order_id)
         if not order.exists():
             raise exceptions.UserError(_("No Sales Order found with ID %s." % sale_order_id))
@@ -70,4 +83,124 @@ class SaleOrder(models.Model):
                 'invoice_ids': [],
                 'log_message': log_message,
                 'woocommerce_order_id': order.woocommerce_order_id or '',
-            }
\ No newline at end of file
+            }
+
+    @api.model
+    def create_invoices_by_order_ids(self, sale_order_ids, invoice_dates=None):
+        """Create and post invoices for many Sales Orders in one call.
+
+        ``invoice_dates`` is either one date for every order or a dict mapping
+        order ids (as strings over XML-RPC) to dates. All invoices are created
+        by one ``_create_invoices`` and posted by one ``action_post``. When
+        the batch fails, orders are invoiced one at a time so that a bad
+        order only fails itself; each result is that of
+        ``create_invoice_by_order_id``.
+        """
+        if not isinstance(invoice_dates, dict):
+            invoice_dates = dict.fromkeys(sale_order_ids, invoice_dates)
+        invoice_dates = {int(order_id): date for order_id, date in invoice_dates.items()}
+
+        orders = self.browse(sale_order_ids).exists()
+        results = {}
+        existing_ids = set(orders.ids)
+        for order_id in sale_order_ids:
+            if order_id not in existing_ids:
+                results[order_id] = {
+                    'success': False,
+                    'message': _("No Sales Order found with ID %s." % order_id),
+                    'invoice_ids': [],
+                    'log_message': _("No Sales Order found with ID %s." % order_id),
+                    'woocommerce_order_id': '',
+                }
+        invalid = orders.filtered(lambda so: so.state not in ['sale', 'done'])
+        for order in invalid:
+            results[order.id] = self._invoice_result_error(
+                order, _("Invoices can only be created for Sales Orders in 'sale' or 'done' state."))
+        orders -= invalid
+
+        if orders:
+            try:
+                with self.env.cr.savepoint():
+                    results.update(orders._create_and_post_invoices_batch(invoice_dates))
+            except Exception as e:
+                _logger.warning(f"Batch invoicing of {len(orders)} Sales Orders failed ({e}), retrying per order")
+                for order in orders:
+                    results[order.id] = order._create_and_post_invoice_isolated(invoice_dates.get(order.id))
+
+        results = [dict(results[order_id], sale_order_id=order_id) for order_id in sale_order_ids]
+        succeeded = sum(1 for result in results if result['success'])
+        log_message = _("Invoiced %s of %s Sales Orders." % (succeeded, len(results)))
+        _logger.info(log_message)
+        return {
+            'success': succeeded == len(results),
+            'message': log_message,
+            'results': results,
+        }
+
+    def _create_and_post_invoices_batch(self, invoice_dates):
+        invoices = self._create_invoices(grouped=True)
+        invoices_by_order = {order.id: order.invoice_ids & invoices for order in self}
+        if any(not order_invoices for order_invoices in invoices_by_order.values()):
+            raise exceptions.UserError(_("No invoices were created."))
+
+        to_date = {}
+        for order in self:
+            if invoice_dates.get(order.id):
+                date = self._parse_invoice_date(invoice_dates[order.id])
+                to_date.setdefault(date, self.env['account.move'])
+                to_date[date] |= invoices_by_order[order.id].filtered(lambda inv: inv.state == 'draft')
+        for date, date_invoices in to_date.items():
+            date_invoices.write({'invoice_date': date})
+
+        invoices.action_post()
+
+        results = {}
+        for order in self:
+            log_message = _("Invoice(s) created and posted successfully for Sales Order %s." % order.name)
+            results[order.id] = {
+                'success': True,
+                'message': _("Invoice(s) created and posted for Sales Order %s." % order.name),
+                'invoice_ids': invoices_by_order[order.id].ids,
+                'log_message': log_message,
+                'woocommerce_order_id': order.woocommerce_order_id or '',
+            }
+        return results
+
+    def _create_and_post_invoice_isolated(self, invoice_date=None):
+        self.ensure_one()
+
+        def call():
+            return {
+                'success': True,
+                'message': _("Invoice(s) created and posted for Sales Order %s." % self.name),
+                'invoice_ids': self.action_create_and_post_invoice(invoice_date=invoice_date),
+                'log_message': _("Invoice(s) created and posted successfully for Sales Order %s." % self.name),
+                'woocommerce_order_id': self.woocommerce_order_id or '',
+            }
+
+        def error_result(e):
+            if isinstance(e, exceptions.UserError):
+                return self._invoice_result_error(self, str(e))
+            log_message = _("Unexpected error for Sales Order %s: %s" % (self.name, str(e)))
+            _logger.exception(log_message)
+            return {
+                'success': False,
+                'message': _("An unexpected error occurred."),
+                'invoice_ids': [],
+                'log_message': log_message,
+                'woocommerce_order_id': self.woocommerce_order_id or '',
+            }
+
+        return call_in_savepoint(self.env, call, error_result)
+
+    @api.model
+    def _invoice_result_error(self, order, message):
+        log_message = _("Error creating invoice for Sales Order %s: %s" % (order.name, message))
+        _logger.error(log_message)
+        return {
+            'success': False,
+            'message': message,
+            'invoice_ids': [],
+            'log_message': log_message,
+            'woocommerce_order_id': order.woocommerce_order_id or '',
+        }
@@ -2,44 +2,100 @@
 
 from odoo import models, fields, api
 from odoo.tools import html_escape
+from odoo.tools.sql import column_exists, create_column
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
 
     custom_available_quantity = fields.Float(
         string="Custom Available Quantity",
-        compute="_compute_custom_available_quantity",
-        store=True,
+        readonly=True,
+        default=0.0,
         help="On-hand quantity minus reserved stock.",
         digits=(16, 0)
     )
 
-    @api.depends('product_variant_ids', 'product_variant_ids.custom_available_quantity')
-    def _compute_custom_available_quantity(self):
-        for template in self:
-            template.custom_available_quantity = sum(
-                variant.custom_available_quantity for variant in template.product_variant_ids
-            )
-
 
 class ProductProduct(models.Model):
     _inherit = 'product.product'
 
+    # Maintained by _update_custom_available_quantity() from stock.move changes
+    # instead of a compute depending on the non-stored qty_available/outgoing_qty
     custom_available_quantity = fields.Float(
         string="Custom Available Quantity",
-        compute="_compute_custom_available_quantity",
-        store=True,
+        readonly=True,
+        default=0.0,
         help="On-hand quantity minus reserved stock.",
         digits=(16, 0)
     )
 
-    @api.depends('qty_available', 'outgoing_qty')
-    def _compute_custom_available_quantity(self):
-        for product in self:
-            reserved_qty = sum(self.env['stock.quant'].search([
-                ('product_id', '=', product.id)
-            ]).mapped('reserved_quantity'))
-            product.custom_available_quantity = product.qty_available - product.outgoing_qty
+    def _mark_custom_available_quantity_dirty(self):
+        """Refresh these products' availability once, just before the transaction commits."""
+        if not self:
+            return
+        dirty = self.env.cr.precommit.data.setdefault('custom_available_quantity.dirty', set())
+        if not dirty:
+            self.env.cr.precommit.add(self._flush_custom_available_quantity)
+        dirty.update(self.ids)
+
+    @api.model
+    def _flush_custom_available_quantity(self):
+        dirty = self.env.cr.precommit.data.pop('custom_available_quantity.dirty', set())
+        if dirty:
+            self._update_custom_available_quantity(list(dirty))
+
+    @api.model
+    def _update_custom_available_quantity(self, product_ids):
+        """Set custom_available_quantity of the given variants and their templates.
+
+        One aggregated UPDATE per table: on hand in warehouse locations minus
+        pending moves leaving the warehouses, i.e. qty_available - outgoing_qty.
+        """
+        if not product_ids:
+            return
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity'])
+        self.env['stock.move'].flush_model(['product_id', 'location_id', 'location_dest_id', 'product_qty', 'state'])
+        self.env.cr.execute("""
+            WITH dirty AS (
+                SELECT DISTINCT unnest(%(product_ids)s::int[]) AS product_id
+            ), on_hand AS (
+                SELECT q.product_id, SUM(q.quantity) AS qty
+                  FROM stock_quant q
+                  JOIN dirty d ON d.product_id = q.product_id
+                  JOIN stock_location l ON l.id = q.location_id
+                 WHERE l.warehouse_id IS NOT NULL
+                 GROUP BY q.product_id
+            ), outgoing AS (
+                SELECT m.product_id, SUM(m.product_qty) AS qty
+                  FROM stock_move m
+                  JOIN dirty d ON d.product_id = m.product_id
+                  JOIN stock_location src ON src.id = m.location_id
+                  JOIN stock_location dest ON dest.id = m.location_dest_id
+                 WHERE m.state IN ('waiting', 'confirmed', 'assigned', 'partially_available')
+                   AND src.warehouse_id IS NOT NULL AND dest.warehouse_id IS NULL
+                 GROUP BY m.product_id
+            )
+            UPDATE product_product pp
+               SET custom_available_quantity = COALESCE(on_hand.qty, 0) - COALESCE(outgoing.qty, 0)
+              FROM dirty
+              LEFT JOIN on_hand ON on_hand.product_id = dirty.product_id
+              LEFT JOIN outgoing ON outgoing.product_id = dirty.product_id
+             WHERE pp.id = dirty.product_id
+            RETURNING pp.product_tmpl_id
+        """, {'product_ids': list(product_ids)})
+        template_ids = list({row[0] for row in self.env.cr.fetchall()})
+        if template_ids:
+            self.env.cr.execute("""
+                UPDATE product_template pt
+                   SET custom_available_quantity = COALESCE((
+                        SELECT SUM(pp.custom_available_quantity)
+                          FROM product_product pp
+                         WHERE pp.product_tmpl_id = pt.id AND pp.active
+                   ), 0)
+                 WHERE pt.id IN %s
+            """, (tuple(template_ids),))
+        self.invalidate_model(['custom_available_quantity'])
+        self.env['product.template'].invalidate_model(['custom_available_quantity'])
 
 
 class SaleOrder(models.Model):
@@ -63,10 +119,90 @@ class SaleOrder(models.Model):
         store=False
     )
 
+    # Delivery progress, kept up to date from picking state changes
+    woocommerce_open_delivery_count = fields.Integer(
+        string="Open Deliveries",
+        compute="_compute_woocommerce_fulfillment",
+        store=True,
+    )
+    woocommerce_done_delivery_count = fields.Integer(
+        string="Done Deliveries",
+        compute="_compute_woocommerce_fulfillment",
+        store=True,
+    )
+    woocommerce_fulfillment_state = fields.Selection([
+        ('none', 'Nothing to Ship'),
+        ('open', 'To Ship'),
+        ('partial', 'Partially Shipped'),
+        ('done', 'Shipped'),
+    ], string="Fulfillment", compute="_compute_woocommerce_fulfillment", store=True, index=True)
+
     _sql_constraints = [
         ('woocommerce_order_id_unique', 'unique(woocommerce_order_id)', 'WooCommerce Order ID must be unique.')
     ]
 
+    # Outgoing pickings counted towards fulfillment (same codes as the completion webhook)
+    _FULFILLMENT_PICKING_CODES = ('outgoing', 'direct')
+
+    def _auto_init(self):
+        """Fill the fulfillment columns with one SQL statement when they are
+        created, instead of the ORM recomputing every order in Python."""
+        if not column_exists(self.env.cr, 'sale_order', 'woocommerce_fulfillment_state'):
+            create_column(self.env.cr, 'sale_order', 'woocommerce_open_delivery_count', 'int4')
+            create_column(self.env.cr, 'sale_order', 'woocommerce_done_delivery_count', 'int4')
+            create_column(self.env.cr, 'sale_order', 'woocommerce_fulfillment_state', 'varchar')
+            self.env.cr.execute("""
+                WITH counts AS (
+                    SELECT so.id,
+                           COUNT(p.id) FILTER (WHERE p.state NOT IN ('done', 'cancel')) AS open_count,
+                           COUNT(p.id) FILTER (WHERE p.state = 'done') AS done_count
+                      FROM sale_order so
+                      LEFT JOIN stock_picking p ON p.sale_id = so.id
+                      LEFT JOIN stock_picking_type t ON t.id = p.picking_type_id AND t.code IN %s
+                     WHERE p.id IS NULL OR t.id IS NOT NULL
+                     GROUP BY so.id
+                )
+                UPDATE sale_order so
+                   SET woocommerce_open_delivery_count = counts.open_count,
+                       woocommerce_done_delivery_count = counts.done_count,
+                       woocommerce_fulfillment_state = CASE
+                           WHEN counts.open_count = 0 AND counts.done_count = 0 THEN 'none'
+                           WHEN counts.open_count = 0 THEN 'done'
+                           WHEN counts.done_count = 0 THEN 'open'
+                           ELSE 'partial' END
+                  FROM counts
+                 WHERE counts.id = so.id
+            """, (self._FULFILLMENT_PICKING_CODES,))
+            self.env.cr.execute("""
+                UPDATE sale_order
+                   SET woocommerce_open_delivery_count = 0, woocommerce_done_delivery_count = 0,
+                       woocommerce_fulfillment_state = 'none'
+                 WHERE woocommerce_fulfillment_state IS NULL
+            """)
+        return super(SaleOrder, self)._auto_init()
+
+    @api.depends('picking_ids.state', 'picking_ids.picking_type_id')
+    def _compute_woocommerce_fulfillment(self):
+        counts = {}
+        if self.ids:
+            groups = self.env['stock.picking'].read_group([
+                ('sale_id', 'in', self.ids),
+                ('picking_type_id.code', 'in', list(self._FULFILLMENT_PICKING_CODES)),
+                ('state', '!=', 'cancel'),
+            ], ['sale_id', 'state'], ['sale_id', 'state'], lazy=False)
+            for group in groups:
+                done = group['state'] == 'done'
+                order_counts = counts.setdefault(group['sale_id'][0], [0, 0])
+                order_counts[1 if done else 0] += group['__count']
+        for order in self:
+            open_count, done_count = counts.get(order._origin.id, (0, 0))
+            order.woocommerce_open_delivery_count = open_count
+            order.woocommerce_done_delivery_count = done_count
+            if not open_count:
+                order.woocommerce_fulfillment_state = 'done' if done_count else 'none'
+            else:
+                order.woocommerce_fulfillment_state = 'partial' if done_count else 'open'
+
     @api.depends('woocommerce_order_id', 'woocommerce_url')
     def _compute_woocommerce_order_link(self):
         for order in self:
@@ -135,4 +271,24 @@ class StockMove(models.Model):
         string="WooCommerce Order ID",
         index=True,
         copy=False,
-    )
\ No newline at end of file
+    )
+
+    # Move fields whose change can alter qty_available or outgoing_qty
+    _CUSTOM_AVAILABLE_TRIGGERS = {
+        'state', 'product_id', 'product_uom_qty', 'product_qty', 'product_uom',
+        'location_id', 'location_dest_id',
+    }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super(StockMove, self).create(vals_list)
+        moves.filtered(lambda m: m.state != 'draft').product_id._mark_custom_available_quantity_dirty()
+        return moves
+
+    def write(self, vals):
+        if not self._CUSTOM_AVAILABLE_TRIGGERS.intersection(vals):
+            return super(StockMove, self).write(vals)
+        products = self.product_id
+        res = super(StockMove, self).write(vals)
+        (products | self.product_id)._mark_custom_available_quantity_dirty()
+        return res
\ No newline at end of file
@@ -32,16 +32,19 @@ class StockPicking(models.Model):
 
         self._send_confirmation_email()
 
-        if self.picking_type_id.code == 'incoming' and self.origin and self.origin.startswith("P"):
+        po_receipts = self.filtered(
+            lambda p: p.picking_type_id.code == 'incoming' and p.origin and p.origin.startswith("P")
+        )
+        if po_receipts:
             _logger.info(
-                "Picking %s is a Purchase Order receipt (%s). Running assign_deliveries_for_paid_so_self().",
-                self.name, self.origin
+                "Pickings %s are Purchase Order receipts (%s). Running assign_deliveries_for_paid_so_self().",
+                po_receipts.mapped('name'), po_receipts.mapped('origin')
             )
-            self.assign_deliveries_for_paid_so_self()
-        else:
+            po_receipts.assign_deliveries_for_paid_so_self()
+        for picking in self - po_receipts:
             _logger.info(
                 "Skipping assign_deliveries_for_paid_so_self() for Picking %s (%s). Not a PO receipt.",
-                self.name, self.origin
+                picking.name, picking.origin
             )
 
         return True
@@ -72,11 +75,25 @@ class StockPicking(models.Model):
 
         _logger.info("Found %d Sale Orders that meet the criteria: %s", len(sale_orders), sale_orders.ids)
 
+        # One search for the first waiting/confirmed picking of every order
+        pickings = self.env["stock.picking"].search([
+            ("origin", "in", sale_orders.mapped("name")),
+            ("state", "in", ["waiting", "confirmed"])
+        ], order="id asc")
+        first_picking_by_origin = {}
+        for picking in pickings:
+            first_picking_by_origin.setdefault(picking.origin, picking)
+
+        # On-hand quantities of every product involved, computed in one pass
+        first_pickings = self.env["stock.picking"].concat(*first_picking_by_origin.values())
+        qty_available = {
+            product_id: qty['qty_available']
+            for product_id, qty in first_pickings.move_ids.product_id._compute_quantities_dict(None, None, None).items()
+        }
+
+        to_assign = self.env["stock.picking"]
         for so in sale_orders:
-            picking = self.env["stock.picking"].search([
-                ("origin", "=", so.name),
-                ("state", "in", ["waiting", "confirmed"])
-            ], order="id asc", limit=1)
+            picking = first_picking_by_origin.get(so.name)
 
             if not picking:
                 _logger.info("Sale Order %s has no waiting or confirmed pickings. Skipping.", so.id)
@@ -84,12 +101,12 @@ class StockPicking(models.Model):
 
             # Check if stock is available but not yet reserved
             stock_available_products = picking.move_ids.filtered(
-                lambda m: m.reserved_availability == 0 and m.product_id.qty_available >= m.product_uom_qty
+                lambda m: m.reserved_availability == 0 and qty_available[m.product_id.id] >= m.product_uom_qty
             )
 
             # Check if ALL products in the picking have enough available stock
             missing_stock_products = picking.move_ids.filtered(
-                lambda m: m.product_id.qty_available < m.product_uom_qty
+                lambda m: qty_available[m.product_id.id] < m.product_uom_qty
             )
 
             if missing_stock_products:
@@ -105,5 +122,9 @@ class StockPicking(models.Model):
                     "Stock available but not reserved for picking %s. Forcing reservation.",
                     picking.id
                 )
-                picking.action_assign()
+                to_assign |= picking
+
+        if to_assign:
+            to_assign.action_assign()
+            for picking in to_assign:
                 _logger.info("After action_assign(), picking %s is in state: '%s'", picking.id, picking.state)
@@ -0,0 +1,99 @@
+# /models/process_paid_order.py
+
+from odoo import models, api, exceptions, _
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    @api.model
+    def process_paid_order(self, sale_order_id, order_date=None, invoice_date=None, journal_id=None,
+                           payment_ref=None, payment_date=None, idempotency_key=None):
+        """Confirm, invoice, post and pay a WooCommerce order in one call.
+
+        Runs ``confirm_order_by_id``, ``create_invoice_by_order_id`` and
+        ``register_payment`` (skipped without ``journal_id``) in one
+        transaction under a savepoint: if a step fails, the earlier ones are
+        rolled back too and ``failed_step`` names the culprit. An order that is
+        already confirmed skips the confirmation. The results of each step are
+        returned under ``confirm``, ``invoice`` and ``payments``.
+        """
+        return self.env['woocommerce.rpc.idempotency']._call_once(
+            'process_paid_order', idempotency_key,
+            [sale_order_id, order_date, invoice_date, journal_id, payment_ref, payment_date],
+            lambda: self._process_paid_order(
+                sale_order_id, order_date=order_date, invoice_date=invoice_date, journal_id=journal_id,
+                payment_ref=payment_ref, payment_date=payment_date,
+            ),
+        )
+
+    @api.model
+    def _process_paid_order(self, sale_order_id, order_date=None, invoice_date=None, journal_id=None,
+                            payment_ref=None, payment_date=None):
+        result = {
+            'success': False,
+            'sale_order_id': sale_order_id,
+            'woocommerce_order_id': '',
+            'failed_step': False,
+            'confirm': {},
+            'invoice': {},
+            'payments': [],
+        }
+        sale_order = self.browse(sale_order_id)
+        if not sale_order.exists():
+            msg = _("Sale Order with ID %s does not exist.") % sale_order_id
+            _logger.error(msg)
+            return dict(result, message=msg, log_message=msg, failed_step='confirm')
+        result['woocommerce_order_id'] = sale_order.woocommerce_order_id or ''
+
+        try:
+            with self.env.cr.savepoint():
+                if sale_order.state in ['sale', 'done']:
+                    result['confirm'] = {
+                        'success': True,
+                        'message': "Sale Order already confirmed.",
+                        'log_message': _("Sale Order %s already confirmed.") % sale_order_id,
+                        'woocommerce_order_id': result['woocommerce_order_id'],
+                    }
+                else:
+                    result['confirm'] = self._confirm_order_by_id(sale_order_id, order_date=order_date)
+                    self._check_pipeline_step(result, 'confirm', result['confirm'])
+
+                result['invoice'] = self._create_invoice_by_order_id(sale_order_id, invoice_date=invoice_date)
+                self._check_pipeline_step(result, 'invoice', result['invoice'])
+
+                if journal_id:
+                    PaymentRegister = self.env['payment.register']
+                    for invoice_id in result['invoice']['invoice_ids']:
+                        payment = PaymentRegister._register_payment(
+                            invoice_id, journal_id, payment_ref=payment_ref,
+                            payment_date=payment_date or invoice_date,
+                        )
+                        result['payments'].append(payment)
+                        self._check_pipeline_step(result, 'payment', payment)
+        except Exception as e:
+            if not result['failed_step']:
+                _logger.exception(f"Unexpected error processing paid Sale Order {sale_order_id}: {e}")
+                result['failed_step'] = 'unknown'
+                msg = str(e)
+            else:
+                msg = str(e)
+                _logger.error(f"Processing paid Sale Order {sale_order_id} failed at {result['failed_step']}: {msg}")
+            return dict(result, message=msg, log_message=msg)
+
+        if journal_id:
+            log_message = _("Sale Order %s confirmed, invoiced and paid.") % sale_order.name
+        else:
+            log_message = _("Sale Order %s confirmed and invoiced.") % sale_order.name
+        _logger.info(log_message)
+        return dict(result, success=True, message="Sale Order processed successfully.", log_message=log_message)
+
+    @api.model
+    def _check_pipeline_step(self, result, step, step_result):
+        """Abort the pipeline savepoint when a step returned a failure."""
+        if not step_result.get('success'):
+            result['failed_step'] = step
+            raise exceptions.UserError(step_result.get('message') or _("Step %s failed.") % step)
@@ -4,6 +4,8 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
 
+from .rpc_savepoint import call_in_savepoint
+
 _logger = logging.getLogger(__name__)
 
 class PaymentRegister(models.Model):
@@ -15,7 +17,18 @@ class PaymentRegister(models.Model):
     custom_payment_ref = fields.Char(string="Payment ref.")
 
     @api.model
-    def register_payment(self, invoice_id, journal_id, payment_ref=None, payment_date=None):
+    def register_payment(self, invoice_id, journal_id, payment_ref=None, payment_date=None, idempotency_key=None,
+                         run_async=False, callback_url=None):
+        return self.env['woocommerce.rpc.idempotency']._call_once(
+            'register_payment', idempotency_key,
+            [invoice_id, journal_id, payment_ref, payment_date, run_async, callback_url],
+            lambda: self.env['woocommerce.rpc.job']._run_or_enqueue(
+                self, 'register_payment', [invoice_id, journal_id],
+                {'payment_ref': payment_ref, 'payment_date': payment_date}, run_async, callback_url),
+        )
+
+    @api.model
+    def _register_payment(self, invoice_id, journal_id, payment_ref=None, payment_date=None):
         try:
             invoice = self.env['account.move'].browse(invoice_id)
             if not invoice.exists():
@@ -110,6 +123,143 @@ class PaymentRegister(models.Model):
                 "log_message": str(e)
             }
 
+    @api.model
+    def register_payments(self, entries):
+        """Register many payments in one call.
+
+        ``entries`` is a list of dicts with ``invoice_id``, ``journal_id`` and
+        optionally ``payment_ref`` and ``payment_date``. Entries sharing a
+        journal, date and document type are paid by one
+        ``account.payment.register`` wizard creating one payment per invoice;
+        each payment then gets its own ``custom_payment_ref``. Entries of a
+        group the wizard could not pay are registered one by one; results
+        are listed in the order of ``entries``, as ``register_payment``
+        returns them.
+        """
+        invoices = self.env['account.move'].browse([entry['invoice_id'] for entry in entries]).exists()
+        journals = self.env['account.journal'].browse([entry['journal_id'] for entry in entries]).exists()
+        invoices_by_id = {invoice.id: invoice for invoice in invoices}
+        journal_ids = set(journals.ids)
+
+        results = [None] * len(entries)
+        groups = {}
+        for index, entry in enumerate(entries):
+            invoice = invoices_by_id.get(entry['invoice_id'])
+            if not invoice:
+                error = f"Invoice with ID {entry['invoice_id']} does not exist."
+            elif invoice.state != 'posted':
+                error = f"Invoice {entry['invoice_id']} is not in a posted state."
+            elif entry['journal_id'] not in journal_ids:
+                error = f"Journal with ID {entry['journal_id']} does not exist."
+            else:
+                error = None
+            if error:
+                _logger.error(f"UserError during payment registration: {error}")
+                results[index] = self._payment_result_error(invoice, error)
+                continue
+            key = (entry['journal_id'], entry.get('payment_date') or False, invoice.move_type)
+            groups.setdefault(key, []).append(index)
+
+        for (journal_id, payment_date, _move_type), indexes in groups.items():
+            try:
+                with self.env.cr.savepoint():
+                    group_results = self._register_payment_group(
+                        [entries[index] for index in indexes], invoices_by_id, journal_id, payment_date)
+            except Exception as e:
+                _logger.warning(f"Batch payment of {len(indexes)} invoices on journal {journal_id} failed ({e}), "
+                                f"retrying per invoice")
+                group_results = [self._register_payment_isolated(entries[index]) for index in indexes]
+            for index, result in zip(indexes, group_results):
+                results[index] = result
+
+        succeeded = sum(1 for result in results if result['success'])
+        log_message = f"Registered {succeeded} of {len(results)} payments."
+        _logger.info(log_message)
+        return {
+            "success": succeeded == len(results),
+            "message": log_message,
+            "results": results,
+        }
+
+    @api.model
+    def _register_payment_group(self, entries, invoices_by_id, journal_id, payment_date):
+        invoices = self.env['account.move'].browse([entry['invoice_id'] for entry in entries])
+        journal = self.env['account.journal'].browse(journal_id)
+        payment_register_vals = {
+            'journal_id': journal.id,
+            'group_payment': False,
+        }
+        if payment_date:
+            payment_register_vals['payment_date'] = payment_date
+        payment_register = self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoices.ids,
+        ).create(payment_register_vals)
+        payments = payment_register._create_payments()
+
+        payment_by_invoice = {}
+        for payment in payments:
+            for invoice in payment.reconciled_invoice_ids:
+                payment_by_invoice.setdefault(invoice.id, payment)
+        missing = invoices.filtered(lambda inv: inv.id not in payment_by_invoice)
+        if missing:
+            raise UserError(f"No payments were created for invoice(s) {', '.join(missing.mapped('name'))}.")
+
+        refs = [(payment_by_invoice[entry['invoice_id']].id, entry['payment_ref'])
+                for entry in entries if entry.get('payment_ref')]
+        if refs:
+            payments.flush_recordset()
+            self.env.cr.execute("""
+                UPDATE account_payment p
+                   SET custom_payment_ref = data.ref
+                  FROM unnest(%s::int[], %s::varchar[]) AS data(payment_id, ref)
+                 WHERE p.id = data.payment_id
+            """, ([ref[0] for ref in refs], [ref[1] for ref in refs]))
+            payments.invalidate_recordset(['custom_payment_ref'])
+
+        results = []
+        for entry in entries:
+            invoice = invoices_by_id[entry['invoice_id']]
+            invoice_ref = invoice.name or f"Move ID {invoice.id}"
+            woocommerce_order_id = invoice.woocommerce_order_id or False
+            if not woocommerce_order_id:
+                sale_orders = invoice.line_ids.mapped('sale_line_ids.order_id')
+                if sale_orders:
+                    woocommerce_order_id = sale_orders[:1].woocommerce_order_id or False
+            doc_type = "Credit Note" if invoice.move_type == 'out_refund' else "Invoice"
+            results.append({
+                "success": True,
+                "message": f"Payment registered for {doc_type} {invoice_ref} using journal {journal.name}",
+                "payment_register_id": payment_register.id,
+                "invoice_ref": invoice_ref,
+                "woocommerce_order_id": woocommerce_order_id,
+                "move_type": invoice.move_type,
+                "log_message": f"Payment registered successfully for {doc_type} {invoice_ref} using Journal '{journal.name}'.",
+            })
+        _logger.info(f"{len(payments)} payments registered using Journal '{journal.name}'.")
+        return results
+
+    @api.model
+    def _register_payment_isolated(self, entry):
+        def error_result(e):
+            _logger.exception(f"Unexpected error during payment registration: {e}")
+            return self._payment_result_error(None, str(e))
+
+        return call_in_savepoint(self.env, lambda: self.register_payment(
+            entry['invoice_id'], entry['journal_id'],
+            payment_ref=entry.get('payment_ref'), payment_date=entry.get('payment_date'),
+        ), error_result)
+
+    @api.model
+    def _payment_result_error(self, invoice, message):
+        return {
+            "success": False,
+            "message": message,
+            "payment_register_id": 0,
+            "invoice_ref": invoice.name if invoice else 'Unknown',
+            "woocommerce_order_id": False,
+            "log_message": message,
+        }
+
 
 class SaleOrder(models.Model):
     _inherit = "sale.order"
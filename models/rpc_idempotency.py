@@ -0,0 +1,95 @@
+# /models/rpc_idempotency.py
+
+import hashlib
+import json
+import logging
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class WooCommerceRpcIdempotency(models.Model):
+    """Responses of WooCommerce RPC calls, keyed by the caller's idempotency key.
+
+    WooCommerce retries a call that timed out; the retry carries the same key
+    and gets the stored response back instead of running the method again.
+    Only successful responses are stored, so a failed call can be retried for
+    real. Keys belong to the user who made the call, and a replay must carry
+    the same arguments: a key reused with other arguments gets an error
+    instead of another call's response. The response is stored in the transaction of the call itself: if
+    two calls with the same key run at once, the second one hits a
+    serialization failure on the unique index, and Odoo's retry of that
+    request then finds the first one's response.
+
+    Rows expire after ``woocommerce_rpc_idempotency_ttl_hours`` (default 24).
+    """
+    _name = 'woocommerce.rpc.idempotency'
+    _description = 'WooCommerce RPC Idempotency Key'
+    _rec_name = 'key'
+
+    key = fields.Char(string='Idempotency Key', required=True)
+    method = fields.Char(string='Method', required=True)
+    args_hash = fields.Char(string='Arguments Hash')
+    response = fields.Text(string='Response')
+
+    _sql_constraints = [
+        ('method_key_unique', 'unique(create_uid, method, key)',
+         'Idempotency key must be unique per user and method.')
+    ]
+
+    @api.model
+    def _get_ttl_hours(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return max(int(ICP.get_param('woocommerce_rpc_idempotency_ttl_hours', default=24)), 1)
+
+    @api.model
+    def _call_once(self, method, idempotency_key, args, call):
+        """Return the stored response of ``method`` for this key, or run ``call()``.
+
+        ``args`` are the JSON-serializable arguments of the call, compared
+        with those of the stored response.
+        """
+        if not idempotency_key:
+            return call()
+        key = str(idempotency_key)
+        args_hash = hashlib.sha256(json.dumps(args, sort_keys=True, default=str).encode()).hexdigest()
+        self.env.cr.execute("""
+            SELECT response, args_hash FROM woocommerce_rpc_idempotency
+             WHERE create_uid = %s AND method = %s AND key = %s
+               AND create_date >= (now() at time zone 'UTC') - %s * interval '1 hour'
+        """, (self.env.uid, method, key, self._get_ttl_hours()))
+        row = self.env.cr.fetchone()
+        if row and row[1] != args_hash:
+            message = f"Idempotency key {key} was already used for {method} with other arguments."
+            _logger.warning(message)
+            return {'success': False, 'message': message, 'log_message': message}
+        if row:
+            _logger.info(f"Replaying stored response of {method} for idempotency key {key}")
+            return json.loads(row[0])
+
+        result = call()
+        if isinstance(result, dict) and result.get('success'):
+            self.env.cr.execute("""
+                INSERT INTO woocommerce_rpc_idempotency (key, method, args_hash, response,
+                                                         create_date, write_date, create_uid, write_uid)
+                VALUES (%(key)s, %(method)s, %(args_hash)s, %(response)s,
+                        now() at time zone 'UTC', now() at time zone 'UTC', %(uid)s, %(uid)s)
+                ON CONFLICT (create_uid, method, key) DO UPDATE
+                   SET args_hash = EXCLUDED.args_hash, response = EXCLUDED.response,
+                       create_date = EXCLUDED.create_date, write_date = EXCLUDED.write_date
+            """, {
+                'key': key,
+                'method': method,
+                'args_hash': args_hash,
+                'response': json.dumps(result, default=str),
+                'uid': self.env.uid,
+            })
+        return result
+
+    @api.autovacuum
+    def _gc_expired_keys(self):
+        self.env.cr.execute("""
+            DELETE FROM woocommerce_rpc_idempotency
+             WHERE create_date < (now() at time zone 'UTC') - %s * interval '1 hour'
+        """, (self._get_ttl_hours(),))
@@ -0,0 +1,324 @@
+# /models/rpc_job.py
+
+from datetime import timedelta
+from urllib.parse import urlsplit
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+
+import requests
+
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+
+from .rpc_savepoint import call_in_savepoint
+from .webhook_dispatcher import post_webhook
+from .webhook_metrics import metrics
+from .webhook_outbox_mixin import lease_due_rows
+
+_logger = logging.getLogger(__name__)
+
+# RPC methods that may run as a job, with the model and positional argument
+# of the record they act on, whose write access the caller must have. A job
+# calls the private ``_<method>`` implementation so it skips the idempotency
+# and async layers.
+ASYNC_METHODS = {
+    ('sale.order', 'confirm_order_by_id'): ('sale.order', 0),
+    ('sale.order', 'create_invoice_by_order_id'): ('sale.order', 0),
+    ('payment.register', 'register_payment'): ('account.move', 0),
+}
+
+SIGNATURE_HEADER = 'X-Chimkins-Signature'
+
+
+class WooCommerceRpcJob(models.Model):
+    """An RPC call run in the background, with its result POSTed to a callback.
+
+    The caller gets the job id right away. A job worker (cron) claims pending
+    jobs with ``FOR UPDATE SKIP LOCKED`` under a lease, runs the method as the
+    calling user, and stores its usual result dict in the same transaction.
+    The result is then POSTed to ``callback_url``, with exponential backoff on
+    failure. Callbacks only go to the hosts of the configured webhook URLs and
+    of ``woocommerce_rpc_callback_hosts`` (comma-separated), and carry an
+    HMAC-SHA256 of the body keyed with ``webhook_api_key`` in the
+    ``X-Chimkins-Signature`` header instead of the key itself.
+    ``woocommerce_rpc_job_workers`` sets how many worker crons exist (applied
+    on module update or by the "Apply Job Worker Count" action).
+    """
+    _name = 'woocommerce.rpc.job'
+    _description = 'WooCommerce RPC Job'
+    _order = 'id desc'
+
+    model = fields.Char(string='Model', required=True)
+    method = fields.Char(string='Method', required=True)
+    args = fields.Text(string='Arguments', default='[]')
+    kwargs = fields.Text(string='Keyword Arguments', default='{}')
+    user_id = fields.Many2one('res.users', string='Run As', required=True, default=lambda self: self.env.uid)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', default='pending', required=True, index=True)
+    attempts = fields.Integer(string='Attempts', default=0)
+    result = fields.Text(string='Result')
+    callback_url = fields.Char(string='Callback URL')
+    callback_state = fields.Selection([
+        ('none', 'No Callback'),
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='Callback', default='none', required=True, index=True)
+    callback_attempts = fields.Integer(string='Callback Attempts', default=0)
+    next_attempt = fields.Datetime(string='Next Attempt', default=fields.Datetime.now, index=True)
+    finished_at = fields.Datetime(string='Finished On')
+    last_error = fields.Text(string='Last Error')
+
+    @api.model
+    def _get_settings(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return {
+            'lease': int(ICP.get_param('woocommerce_rpc_job_lease_seconds', default=600)),
+            'max_attempts': int(ICP.get_param('woocommerce_rpc_job_max_attempts', default=3)),
+            'max_callback_attempts': int(ICP.get_param('woocommerce_rpc_job_max_callback_attempts', default=10)),
+            'time_budget': int(ICP.get_param('woocommerce_rpc_job_time_budget', default=240)),
+        }
+
+    @api.model
+    def _get_worker_crons(self):
+        return self.env['ir.cron'].sudo().with_context(active_test=False).search([
+            ('model_id.model', '=', self._name),
+            ('code', '=', 'model._cron_run_jobs()'),
+        ], order='id')
+
+    @api.model
+    def _sync_worker_crons(self):
+        """Make ``woocommerce_rpc_job_workers`` job worker crons active.
+
+        Jobs are claimed with SKIP LOCKED, so worker crons run side by side;
+        their parallelism is still capped by the server's max_cron_threads.
+        """
+        base = self.env.ref(f'{self._module}.ir_cron_woocommerce_rpc_job', raise_if_not_found=False)
+        if not base:
+            return
+        ICP = self.env['ir.config_parameter'].sudo()
+        workers = max(int(ICP.get_param('woocommerce_rpc_job_workers', default=2)), 1)
+        crons = self._get_worker_crons()
+        for index in range(len(crons), workers):
+            crons |= base.sudo().copy({'name': f"{base.name} #{index + 1}"})
+        crons[:workers].filtered(lambda cron: not cron.active).write({'active': True})
+        (crons - base)[workers - 1:].write({'active': False})
+
+    @api.model
+    def _get_callback_hosts(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        urls = [ICP.get_param('webhook_stock_update', default=''), ICP.get_param('webhook_change_status', default='')]
+        hosts = {urlsplit(url).netloc.lower() for url in urls if url}
+        extra = ICP.get_param('woocommerce_rpc_callback_hosts', default='')
+        hosts.update(host.strip().lower() for host in extra.split(',') if host.strip())
+        return hosts
+
+    @api.model
+    def _check_callback_url(self, callback_url):
+        """Error message if ``callback_url`` may not be called back, else False."""
+        parts = urlsplit(callback_url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            return _("Callback URL must be an http(s) URL.")
+        if parts.netloc.lower() not in self._get_callback_hosts():
+            return _("Callback host %s is not an allowed webhook host.") % parts.netloc
+        return False
+
+    @api.model
+    def _run_or_enqueue(self, records, method, args, kwargs, run_async=False, callback_url=None):
+        """Run ``records._<method>(*args, **kwargs)`` now, or queue it as a job."""
+        if not run_async:
+            return getattr(records, f'_{method}')(*args, **kwargs)
+
+        error = callback_url and self._check_callback_url(callback_url)
+        if not error:
+            # The job runs later as this user: check now that they may act on the target
+            target_model, arg_index = ASYNC_METHODS[(records._name, method)]
+            target = records.env[target_model].browse(args[arg_index]).exists()
+            if not target:
+                error = _("No %s found with ID %s.") % (target_model, args[arg_index])
+            else:
+                try:
+                    target.check_access_rights('write')
+                    target.check_access_rule('write')
+                except AccessError as e:
+                    error = str(e)
+        if error:
+            _logger.warning(f"{method} job refused: {error}")
+            return {'success': False, 'message': error, 'log_message': error, 'job_id': 0, 'woocommerce_order_id': ''}
+
+        job = self.sudo().create({
+            'model': records._name,
+            'method': method,
+            'args': json.dumps(args),
+            'kwargs': json.dumps(kwargs),
+            'user_id': self.env.uid,
+            'callback_url': callback_url or False,
+            'callback_state': 'pending' if callback_url else 'none',
+        })
+        for cron in self._get_worker_crons().filtered('active'):
+            cron._trigger()
+        log_message = _("%s queued as job %s.") % (method, job.id)
+        _logger.info(log_message)
+        return {
+            'success': True,
+            'message': "Job queued.",
+            'log_message': log_message,
+            'job_id': job.id,
+            'woocommerce_order_id': '',
+        }
+
+    @api.model
+    def get_job_status(self, job_id):
+        """RPC: state of a job and, once finished, its result."""
+        job = self.sudo().browse(job_id).exists()
+        if not job or job.user_id != self.env.user:
+            msg = _("No job found with ID %s.") % job_id
+            return {'success': False, 'message': msg, 'log_message': msg, 'job_id': job_id}
+        return {
+            'success': True,
+            'message': job.state,
+            'log_message': job.state,
+            'job_id': job.id,
+            'state': job.state,
+            'result': json.loads(job.result) if job.result else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Job workers
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _claim(self, where, lease):
+        """Lease one due job matching ``where``, see ``lease_due_rows``."""
+        ids = lease_due_rows(self.env.cr, self._table, where, 1, lease)
+        self.invalidate_model(['next_attempt'])
+        return self.browse(ids)
+
+    @api.model
+    def _cron_run_jobs(self):
+        """Run due jobs, then deliver due callbacks, until the time budget is spent.
+
+        Jobs left ``running`` by a crashed worker are claimed again once their
+        lease expires.
+        """
+        settings = self._get_settings()
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        deadline = time.monotonic() + settings['time_budget']
+        while time.monotonic() < deadline:
+            job = self._claim("state IN ('pending', 'running')", settings['lease'])
+            if job:
+                job.write({'state': 'running', 'attempts': job.attempts + 1})
+                if auto_commit:
+                    self.env.cr.commit()
+                job._execute(settings)
+            else:
+                job = self._claim("state IN ('done', 'failed') AND callback_state = 'pending'", settings['lease'])
+                if not job:
+                    break
+                if auto_commit:
+                    self.env.cr.commit()
+                job._send_callback(settings)
+            if not auto_commit:
+                break
+            metrics.flush_after_commit(self.env, force=True)
+            self.env.cr.commit()
+
+    def _execute(self, settings):
+        self.ensure_one()
+        if (self.model, self.method) not in ASYNC_METHODS:
+            error = f"{self.model}.{self.method} cannot run as a job"
+            self.write({
+                'state': 'failed',
+                'result': json.dumps({'success': False, 'message': error, 'log_message': error, 'job_id': self.id}),
+                'finished_at': fields.Datetime.now(),
+                'next_attempt': fields.Datetime.now(),
+                'last_error': error,
+            })
+            return
+        records = self.env[self.model].with_user(self.user_id)
+        errors = []
+
+        def error_result(e):
+            _logger.exception(f"RPC job {self.id} ({self.method}) failed: {e}")
+            errors.append(e)
+            return {'success': False, 'message': str(e), 'log_message': str(e)}
+
+        result = call_in_savepoint(
+            self.env,
+            lambda: getattr(records, f'_{self.method}')(*json.loads(self.args), **json.loads(self.kwargs)),
+            error_result,
+        )
+        if errors and self.attempts < settings['max_attempts']:
+            self.write({'state': 'pending', 'next_attempt': fields.Datetime.now(), 'last_error': result['message']})
+            return
+        self.write({
+            'state': 'done' if result.get('success') else 'failed',
+            'result': json.dumps(dict(result, job_id=self.id), default=str),
+            'finished_at': fields.Datetime.now(),
+            'next_attempt': fields.Datetime.now(),
+            'last_error': False if result.get('success') else result.get('message'),
+        })
+        _logger.info(f"RPC job {self.id} ({self.method}) finished: {self.state}")
+
+    def _send_callback(self, settings):
+        self.ensure_one()
+        url = self.callback_url
+        error = self._check_callback_url(url)
+        if error:
+            # The allowed hosts changed since the job was queued
+            self.write({'callback_state': 'failed', 'last_error': error})
+            return
+
+        # One breaker per host, so callers' URLs cannot grow the endpoint table
+        parts = urlsplit(url)
+        breaker_key = f"{parts.scheme}://{parts.netloc.lower()}"
+        Endpoint = self.env['webhook.endpoint'].sudo()
+        if not Endpoint._allow_request(breaker_key):
+            metrics.inc('chimkins_webhook_requests_total', webhook='rpc_callback', result='circuit_open')
+            self.write({'next_attempt': fields.Datetime.now() + timedelta(seconds=60)})
+            return
+
+        body = json.dumps(dict(json.loads(self.result or '{}'), method=self.method)).encode('utf-8')
+        secret = self.env['ir.config_parameter'].sudo().get_param('webhook_api_key', default='')
+        signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        try:
+            with metrics.timer('chimkins_webhook_request_seconds', webhook='rpc_callback'):
+                response = post_webhook(url, body, timeout=10, headers={SIGNATURE_HEADER: f'sha256={signature}'})
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+
+        if not error:
+            metrics.inc('chimkins_webhook_requests_total', webhook='rpc_callback', result='sent')
+            Endpoint._record_success(breaker_key)
+            self.write({'callback_state': 'sent', 'last_error': False})
+            return
+
+        _logger.warning(f"Callback of RPC job {self.id} failed: {error}")
+        metrics.inc('chimkins_webhook_requests_total', webhook='rpc_callback', result='failed')
+        Endpoint._record_failure(breaker_key, error)
+        attempts = self.callback_attempts + 1
+        self.write({
+            'callback_attempts': attempts,
+            'callback_state': 'failed' if attempts >= settings['max_callback_attempts'] else 'pending',
+            'next_attempt': fields.Datetime.now() + timedelta(seconds=min(30 * 2 ** attempts, 3600)),
+            'last_error': error,
+        })
+
+    @api.autovacuum
+    def _gc_finished_jobs(self):
+        """Drop finished jobs after a week, once their callback is settled."""
+        limit_date = fields.Datetime.now() - timedelta(days=7)
+        self.search([
+            ('state', 'in', ['done', 'failed']),
+            ('callback_state', '!=', 'pending'),
+            ('finished_at', '<', limit_date),
+        ]).unlink()
@@ -0,0 +1,26 @@
+# /models/rpc_savepoint.py
+
+
+class _FailedResult(Exception):
+    """Raised to roll back the savepoint of a call that reported a failure."""
+
+
+def call_in_savepoint(env, call, error_result):
+    """Run ``call()`` under a savepoint and return the result dict it returns.
+
+    A result whose ``success`` is false rolls the savepoint back, so that a
+    call failing halfway keeps nothing it wrote. If ``call`` raises,
+    ``error_result(exception)`` is returned instead. Bulk RPCs use this to
+    retry the records of a failed batch one by one.
+    """
+    result = {}
+    try:
+        with env.cr.savepoint():
+            result = call()
+            if not result.get('success'):
+                raise _FailedResult()
+    except _FailedResult:
+        pass
+    except Exception as e:
+        return error_result(e)
+    return result
@@ -3,6 +3,9 @@ import requests
 from odoo.exceptions import UserError
 import logging
 
+from .webhook_dispatcher import post_webhook
+from .webhook_metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 class StockPicking(models.Model):
@@ -19,46 +22,143 @@ class StockPicking(models.Model):
         help="Indicates if a webhook has already been sent for this WooCommerce order."
     )
 
-    @api.model
-    def create(self, vals):
-        picking = super(StockPicking, self).create(vals)
-        if 'origin' in vals:
-            sale_order = self.env['sale.order'].search([('name', '=', vals['origin'])], limit=1)
-            if sale_order and sale_order.woocommerce_order_id:
-                picking.woocommerce_order_id = sale_order.woocommerce_order_id
-        if picking.woocommerce_order_id:
-            picking.move_ids.write({'woocommerce_order_id': picking.woocommerce_order_id})
-        return picking
+    @api.model_create_multi
+    def create(self, vals_list):
+        pickings = super(StockPicking, self).create(vals_list)
+
+        # Resolve every origin with one search; the first order per name wins, as with limit=1
+        origins = {vals['origin'] for vals in vals_list if vals.get('origin')}
+        order_by_name = {}
+        if origins:
+            for sale_order in self.env['sale.order'].search([('name', 'in', list(origins))]):
+                order_by_name.setdefault(sale_order.name, sale_order)
+
+        picking_ids, wc_order_ids = [], []
+        for picking, vals in zip(pickings, vals_list):
+            sale_order = order_by_name.get(vals.get('origin'))
+            wc_order_id = (sale_order and sale_order.woocommerce_order_id) or picking.woocommerce_order_id
+            if wc_order_id:
+                picking_ids.append(picking.id)
+                wc_order_ids.append(wc_order_id)
+        if not picking_ids:
+            return pickings
+
+        # One UPDATE per table for the whole batch, whatever the number of orders
+        self.env['stock.move'].flush_model(['picking_id', 'woocommerce_order_id'])
+        self.flush_model(['woocommerce_order_id'])
+        params = (picking_ids, wc_order_ids)
+        self.env.cr.execute("""
+            UPDATE stock_picking p
+               SET woocommerce_order_id = v.woocommerce_order_id
+              FROM unnest(%s::int[], %s::varchar[]) AS v(picking_id, woocommerce_order_id)
+             WHERE p.id = v.picking_id AND p.woocommerce_order_id IS DISTINCT FROM v.woocommerce_order_id
+        """, params)
+        self.env.cr.execute("""
+            UPDATE stock_move m
+               SET woocommerce_order_id = v.woocommerce_order_id
+              FROM unnest(%s::int[], %s::varchar[]) AS v(picking_id, woocommerce_order_id)
+             WHERE m.picking_id = v.picking_id
+        """, params)
+        self.browse(picking_ids).invalidate_recordset(['woocommerce_order_id'])
+        self.env['stock.move'].invalidate_model(['woocommerce_order_id'])
+        return pickings
 
     def button_validate(self):
         res = super(StockPicking, self).button_validate()
-        for picking in self:
-            # Only consider outgoing or direct pickings (adjust as needed)
-            if picking.woocommerce_order_id and picking.picking_type_id.code in ['outgoing', 'direct']:
-                picking._check_and_send_webhook()
+        # Only consider outgoing or direct pickings (adjust as needed)
+        self.filtered(
+            lambda p: p.woocommerce_order_id and p.picking_type_id.code in ['outgoing', 'direct']
+        )._check_and_send_webhook()
         return res
 
     def _check_and_send_webhook(self):
-        """Check if all pickings for this WooCommerce order are done, and if so, send a webhook."""
+        """Queue the completed status of each WooCommerce order of these pickings
+        whose deliveries are all done; it is sent after commit by the
+        completion outbox, which sets woocommerce_webhook_sent once acknowledged."""
         # If webhook already sent, do nothing
-        if self.woocommerce_webhook_sent:
+        pickings = self.filtered(lambda p: p.woocommerce_order_id and not p.woocommerce_webhook_sent)
+        if not pickings:
             return
 
-        # Get all pickings with the same WooCommerce order and of relevant type
+        completed = self.browse()
+        # Pickings of a sale order: "all shipped" is the order's stored fulfillment state
+        linked = pickings.filtered('sale_id')
+        picking_by_order = {}
+        for picking in linked:
+            picking_by_order.setdefault(picking.sale_id, picking)
+        for sale_order, picking in picking_by_order.items():
+            if sale_order.woocommerce_fulfillment_state == 'done':
+                completed |= picking
+            else:
+                logger.info(f"Not all pickings for WooCommerce Order ID '{picking.woocommerce_order_id}' are done.")
+
+        completed |= (pickings - linked)._get_completed_by_search()
+        self.env['woocommerce.completion.outbox']._enqueue(completed)
+
+    def _get_completed_by_search(self):
+        """Fallback for pickings without a sale order: look up the other pickings
+        of their WooCommerce orders. Returns one picking per completed order."""
+        if not self:
+            return self
+        # Get all pickings with the same WooCommerce orders and of relevant type, in one search
         related_pickings = self.search([
-            ('woocommerce_order_id', '=', self.woocommerce_order_id),
+            ('woocommerce_order_id', 'in', list(set(self.mapped('woocommerce_order_id')))),
             ('picking_type_id.code', 'in', ['outgoing', 'direct']),
         ])
-        # Check if all these pickings are done
-        if all(p.state == 'done' for p in related_pickings):
-            self._send_woocommerce_webhook()
-            # Mark all related pickings (or the order) as webhook sent
-            related_pickings.write({'woocommerce_webhook_sent': True})
-        else:
-            logger.info(f"Not all pickings for WooCommerce Order ID '{self.woocommerce_order_id}' are done.")
+        related_by_order = {}
+        for related in related_pickings:
+            related_by_order.setdefault(related.woocommerce_order_id, self.browse())
+            related_by_order[related.woocommerce_order_id] |= related
+
+        completed = self.browse()
+        for picking in self:
+            order_pickings = related_by_order.pop(picking.woocommerce_order_id, None)
+            if order_pickings is None:
+                continue  # order already handled through another of these pickings
+            # Check if all these pickings are done
+            if all(p.state == 'done' for p in order_pickings):
+                completed |= picking
+            else:
+                logger.info(f"Not all pickings for WooCommerce Order ID '{picking.woocommerce_order_id}' are done.")
+        return completed
+
+    @api.model
+    def _cron_send_parked_completion_webhooks(self, limit=200):
+        """Queue completed orders whose status was never queued, e.g. when the
+        outbox insert was skipped because no URL was configured yet. Only
+        orders whose deliveries are all done or cancelled are picked, so
+        partly shipped orders never hold the head of the list. Orders that
+        are already queued, or whose status failed for good, are skipped."""
+        self.env.cr.execute("""
+            SELECT DISTINCT woocommerce_order_id FROM woocommerce_completion_outbox
+             WHERE state IN ('pending', 'processing', 'failed')
+        """)
+        excluded_order_ids = [row[0] for row in self.env.cr.fetchall()]
+        pickings = self.search([
+            ('woocommerce_order_id', '!=', False),
+            ('woocommerce_order_id', 'not in', excluded_order_ids),
+            ('woocommerce_webhook_sent', '=', False),
+            ('state', '=', 'done'),
+            ('picking_type_id.code', 'in', ['outgoing', 'direct']),
+            ('sale_id.woocommerce_fulfillment_state', '=', 'done'),
+        ], order='date_done asc, id asc', limit=limit)
+        pickings._check_and_send_webhook()
+
+    def _prepare_woocommerce_completion_entry(self):
+        """Status of this picking's WooCommerce order, as sent to the shop."""
+        return {
+            'woocommerce_order_id': self.woocommerce_order_id,
+            'status': 'completed',
+            'date_done': self.date_done.isoformat() if self.date_done else None,
+        }
 
     def _send_woocommerce_webhook(self):
-        """Send the webhook to update the WooCommerce order status."""
+        """Send the webhook to update the WooCommerce order status.
+
+        Called by the completion outbox after commit. Returns whether the
+        endpoint acknowledged it. Nothing is sent while the endpoint's circuit
+        breaker is open.
+        """
         api_key = self.env['ir.config_parameter'].sudo().get_param('webhook_api_key', default='')
         if not api_key:
             logger.warning("No global API key found for webhook. Webhook not sent.")
@@ -67,19 +167,26 @@ class StockPicking(models.Model):
         url = self.env['ir.config_parameter'].sudo().get_param('webhook_change_status', default='')
         if not url:
             logger.warning("No return URL found for webhook. Webhook not sent.")
-            return
+            return False
 
-        payload = {
-            'woocommerce_order_id': self.woocommerce_order_id,
-            'status': 'completed',
-            'date_done': self.date_done.isoformat() if self.date_done else None,
-            'api_key': api_key,
-        }
-        headers = {'Content-Type': 'application/json'}
+        Endpoint = self.env['webhook.endpoint'].sudo()
+        if Endpoint._is_open(url):
+            logger.info(f"Webhook endpoint circuit is open; parking status for WooCommerce Order ID '{self.woocommerce_order_id}'.")
+            metrics.inc('chimkins_webhook_requests_total', webhook='change_status', result='circuit_open')
+            return False
+
+        payload = dict(self._prepare_woocommerce_completion_entry(), api_key=api_key)
         try:
-            logger.info(f"Sending webhook for WooCommerce Order ID '{self.woocommerce_order_id}' with payload: {payload}")
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            logger.info(f"Sending webhook for WooCommerce Order ID '{self.woocommerce_order_id}'.")
+            with metrics.timer('chimkins_webhook_request_seconds', webhook='change_status'):
+                response = post_webhook(url, payload, timeout=10)
             response.raise_for_status()
             logger.info(f"Webhook sent successfully for WooCommerce Order ID '{self.woocommerce_order_id}'.")
+            metrics.inc('chimkins_webhook_requests_total', webhook='change_status', result='sent')
+            Endpoint._record_success(url)
+            return True
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to send webhook for WooCommerce Order ID '{self.woocommerce_order_id}': {e}")
+            metrics.inc('chimkins_webhook_requests_total', webhook='change_status', result='failed')
+            Endpoint._record_failure(url, str(e))
+            return False
@@ -1,140 +1,294 @@
+import uuid
 import requests
-import json
-import time
 from odoo import models, fields, api
 import logging
-from odoo.tools import config
+from odoo.tools import split_every
+
+from .webhook_dispatcher import post_webhook
+from .webhook_metrics import metrics
 
 _logger = logging.getLogger(__name__)
 
 class StockQuant(models.Model):
     _inherit = 'stock.quant'
     @api.model
-    def _get_webhook_dedup_key(self, products, operation_type='default'):
-        """Generate consistent deduplication key"""
-        product_ids = ','.join(map(str, sorted(products.ids)))
-        return f"webhook_{product_ids}_{operation_type}_{int(time.time())}"
+    def _send_webhook_with_retry(self, webhook_url, payload):
+        """Send webhook on the endpoint's shared keep-alive session.
+
+        Makes a single attempt; a failed delivery is retried later by the
+        outbox (see stock.webhook.outbox), so no thread sleeps between attempts.
+        """
+        Endpoint = self.env['webhook.endpoint'].sudo()
+        if Endpoint._is_open(webhook_url):
+            _logger.info("Stock webhook endpoint circuit is open, delivery postponed")
+            metrics.inc('chimkins_webhook_requests_total', webhook='stock_update', result='circuit_open')
+            return False
+
+        compress = self.env['ir.config_parameter'].sudo().get_param('webhook_stock_gzip', default='') in ('1', 'True', 'true')
+        error = None
+        try:
+            with metrics.timer('chimkins_webhook_request_seconds', webhook='stock_update'):
+                response = post_webhook(webhook_url, payload, timeout=10, compress=compress)
+
+            if response.status_code in [200, 201, 202]:
+                _logger.info(f"Stock webhook sent successfully for {len(payload['products'])} products")
+                metrics.inc('chimkins_webhook_requests_total', webhook='stock_update', result='sent')
+                Endpoint._record_success(webhook_url)
+                return True
+            error = f"{response.status_code} - {response.text}"
+            _logger.warning(f"Webhook attempt failed: {error}")
+
+        except requests.exceptions.Timeout:
+            error = "timeout"
+            _logger.warning("Webhook attempt timeout")
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+            _logger.warning(f"Webhook attempt failed: {str(e)}")
+        except Exception as e:
+            error = str(e)
+            _logger.error(f"Webhook attempt unexpected error: {str(e)}")
+
+        metrics.inc('chimkins_webhook_requests_total', webhook='stock_update', result='failed')
+        Endpoint._record_failure(webhook_url, error)
+        return False
 
     @api.model
-    def _is_webhook_already_scheduled(self, products, operation_type='default'):
-        """Check if webhook is already scheduled for these products"""
-        if not hasattr(self.env.registry, '_webhook_scheduled'):
-            self.env.registry._webhook_scheduled = {}
-        
-        current_time = int(time.time())
-        old_keys = [k for k, v in self.env.registry._webhook_scheduled.items() 
-                   if current_time - v > 5]
-        for k in old_keys:
-            del self.env.registry._webhook_scheduled[k]
-        
-        base_key = f"webhook_{','.join(map(str, sorted(products.ids)))}"
-        existing_keys = [k for k in self.env.registry._webhook_scheduled.keys() 
-                        if k.startswith(base_key)]
-        
-        return bool(existing_keys)
+    def _get_stock_webhook_quantities(self, products):
+        """Compute on hand / forecast / available for the whole product set at once.
+
+        Uses a single _compute_quantities_dict pass (a handful of grouped
+        stock.quant and stock.move queries) instead of reading the non-stored
+        qty_available, virtual_available and outgoing_qty product by product.
+        """
+        ctx = self.env.context
+        res = products._compute_quantities_dict(
+            ctx.get('lot_id'), ctx.get('owner_id'), ctx.get('package_id'),
+            ctx.get('from_date'), ctx.get('to_date'),
+        )
+        return {
+            product_id: {
+                'on_hand': qty['qty_available'],
+                'forecast': qty['virtual_available'],
+                'available': qty['qty_available'] - qty['outgoing_qty'],
+            }
+            for product_id, qty in res.items()
+        }
 
     @api.model
-    def _mark_webhook_scheduled(self, products, operation_type='default'):
-        """Mark webhook as scheduled for deduplication"""
-        if not hasattr(self.env.registry, '_webhook_scheduled'):
-            self.env.registry._webhook_scheduled = {}
-        
-        dedup_key = self._get_webhook_dedup_key(products, operation_type)
-        self.env.registry._webhook_scheduled[dedup_key] = int(time.time())
-        return dedup_key
+    def _get_stock_webhook_warehouse_quantities(self, product_ids):
+        """Per-warehouse on hand / forecast / available for a batch of products.
+
+        One grouped query over stock.quant and stock.move covers the whole batch
+        and every warehouse, instead of one with_context(warehouse=...) pass per
+        warehouse. A location belongs to a warehouse through its stored
+        warehouse_id; moves between two locations of the same warehouse are
+        neither incoming nor outgoing for it.
+        """
+        if not product_ids:
+            return {}
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity'])
+        self.env['stock.move'].flush_model(['product_id', 'location_id', 'location_dest_id', 'product_qty', 'state'])
+        self.env['stock.location'].flush_model(['usage', 'warehouse_id'])
+        self.env.cr.execute("""
+            WITH figures AS (
+                SELECT q.product_id, l.warehouse_id,
+                       q.quantity AS on_hand, 0 AS incoming, 0 AS outgoing
+                  FROM stock_quant q
+                  JOIN stock_location l ON l.id = q.location_id
+                 WHERE q.product_id IN %(product_ids)s
+                   AND l.usage = 'internal' AND l.warehouse_id IS NOT NULL
+                UNION ALL
+                SELECT m.product_id, dest.warehouse_id,
+                       0, m.product_qty, 0
+                  FROM stock_move m
+                  JOIN stock_location src ON src.id = m.location_id
+                  JOIN stock_location dest ON dest.id = m.location_dest_id
+                 WHERE m.product_id IN %(product_ids)s
+                   AND m.state IN ('waiting', 'confirmed', 'assigned', 'partially_available')
+                   AND dest.warehouse_id IS NOT NULL
+                   AND dest.warehouse_id IS DISTINCT FROM src.warehouse_id
+                UNION ALL
+                SELECT m.product_id, src.warehouse_id,
+                       0, 0, m.product_qty
+                  FROM stock_move m
+                  JOIN stock_location src ON src.id = m.location_id
+                  JOIN stock_location dest ON dest.id = m.location_dest_id
+                 WHERE m.product_id IN %(product_ids)s
+                   AND m.state IN ('waiting', 'confirmed', 'assigned', 'partially_available')
+                   AND src.warehouse_id IS NOT NULL
+                   AND src.warehouse_id IS DISTINCT FROM dest.warehouse_id
+            )
+            SELECT f.product_id, w.id, w.code, w.name,
+                   SUM(f.on_hand), SUM(f.incoming), SUM(f.outgoing)
+              FROM figures f
+              JOIN stock_warehouse w ON w.id = f.warehouse_id
+             GROUP BY f.product_id, w.id, w.code, w.name
+             ORDER BY f.product_id, w.id
+        """, {'product_ids': tuple(product_ids)})
+
+        result = {}
+        for product_id, warehouse_id, code, name, on_hand, incoming, outgoing in self.env.cr.fetchall():
+            result.setdefault(product_id, []).append({
+                'warehouse_id': warehouse_id,
+                'warehouse_code': code or '',
+                'warehouse_name': name or '',
+                'on_hand': on_hand,
+                'forecast': on_hand + incoming - outgoing,
+                'available': on_hand - outgoing,
+            })
+        return result
 
     @api.model
-    def _send_webhook_with_retry(self, webhook_url, payload, max_retries=3):
-        """Send webhook with exponential backoff retry"""
-        
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(
-                    webhook_url,
-                    json=payload,
-                    timeout=10,
-                    headers={'Content-Type': 'application/json'}
-                )
-                
-                if response.status_code in [200, 201, 202]:
-                    _logger.info(f"Stock webhook sent successfully (attempt {attempt + 1}) for {len(payload['products'])} products")
-                    return True
-                else:
-                    _logger.warning(f"Webhook attempt {attempt + 1} failed: {response.status_code} - {response.text}")
-                    
-            except requests.exceptions.Timeout:
-                _logger.warning(f"Webhook attempt {attempt + 1} timeout")
-            except requests.exceptions.RequestException as e:
-                _logger.warning(f"Webhook attempt {attempt + 1} failed: {str(e)}")
-            except Exception as e:
-                _logger.error(f"Webhook attempt {attempt + 1} unexpected error: {str(e)}")
-            
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-        
-        _logger.error(f"Webhook failed after {max_retries} attempts")
-        return False
+    def _collect_stock_webhook_quantities(self, webhook_url, products, chunk_size, full=False):
+        """Quantities of the products that need sending, computed chunk by chunk."""
+        Snapshot = self.env['stock.webhook.snapshot'].sudo()
+        to_send = {}
+        for chunk_ids in split_every(chunk_size, products.ids):
+            quantities = self._get_stock_webhook_quantities(products.browse(chunk_ids))
+            if not full:
+                changed_ids = Snapshot._filter_changed(webhook_url, quantities)
+                quantities = {product_id: quantities[product_id] for product_id in changed_ids}
+            to_send.update(quantities)
+        return to_send
+
+    @api.model
+    def _iter_stock_payloads(self, quantities, chunk_size, header, per_warehouse=False):
+        """Yield ``(payload, chunk_quantities)`` for consecutive chunks of products.
+
+        Each payload carries a ``batch`` marker (id, sequence, total) so the
+        receiver can tell when the last chunk of an update has arrived. With
+        ``per_warehouse``, every product also lists its figures per warehouse.
+        """
+        product_ids = list(quantities)
+        total = -(-len(product_ids) // chunk_size)
+        batch_id = uuid.uuid4().hex
+        for sequence, chunk_ids in enumerate(split_every(chunk_size, product_ids), start=1):
+            chunk = self.env['product.product'].browse(chunk_ids)
+            warehouses = self._get_stock_webhook_warehouse_quantities(chunk_ids) if per_warehouse else {}
+            stock_data = []
+            for product in chunk:
+                qty = quantities[product.id]
+                product_data = {
+                    'product_id': product.id,
+                    'product_sku': product.default_code or '',
+                    'product_name': product.name,
+                    'on_hand': qty['on_hand'],
+                    'forecast': qty['forecast'],
+                    'available': qty['available']
+                }
+                if per_warehouse:
+                    product_data['warehouses'] = warehouses.get(product.id, [])
+                stock_data.append(product_data)
+            payload = dict(header, products=stock_data, batch={
+                'id': batch_id,
+                'sequence': sequence,
+                'total': total,
+            })
+            yield payload, {product_id: quantities[product_id] for product_id in chunk_ids}
+            chunk.invalidate_recordset(['name', 'default_code'])
 
     @api.model
-    def _send_stock_webhook(self, products):
-        """Send computed stock via webhook - optimized version"""
+    def _send_stock_webhook(self, products, full=False):
+        """Send computed stock via webhook and return whether it was acknowledged.
+
+        Only products whose figures changed since the endpoint last acknowledged
+        them are sent, unless ``full`` is set. Large sets are split into chunks
+        of ``webhook_stock_chunk_size`` products; each acknowledged chunk is
+        recorded, so a retry only resends the chunks that did not get through.
+        """
         if not products:
             _logger.info(f"Stock webhook skipped: products={bool(products)}")
-            return
+            return True
 
         try:
-            api_key = self.env['ir.config_parameter'].sudo().get_param('webhook_api_key', default='')
+            ICP = self.env['ir.config_parameter'].sudo()
+            api_key = ICP.get_param('webhook_api_key', default='')
             odoo_db = self.env.cr.dbname
-            odoo_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url', default='')
-            webhook_url = self.env['ir.config_parameter'].sudo().get_param('webhook_stock_update', default='')
+            odoo_url = ICP.get_param('web.base.url', default='')
+            webhook_url = ICP.get_param('webhook_stock_update', default='')
+            chunk_size = max(int(ICP.get_param('webhook_stock_chunk_size', default=500)), 1)
+            per_warehouse = ICP.get_param('webhook_stock_per_warehouse', default='') in ('1', 'True', 'true')
 
             if not webhook_url:
-                return
-
-            stock_data = []
-            for product in products:
-                on_hand = product.qty_available
-                forecast = product.virtual_available
-                available = product.qty_available - product.outgoing_qty
-
-                stock_data.append({
-                    'product_id': product.id,
-                    'product_sku': product.default_code or '',
-                    'product_name': product.name,
-                    'on_hand': on_hand,
-                    'forecast': forecast,
-                    'available': available
-                })
-
-            payload = {
+                return True
+
+            # Snapshots only hold company-wide figures, which an inter-warehouse
+            # transfer leaves unchanged: the breakdown is always sent in full.
+            with metrics.timer('chimkins_stock_payload_build_seconds', stage='quantities'):
+                quantities = self._collect_stock_webhook_quantities(
+                    webhook_url, products, chunk_size, full=full or per_warehouse)
+            metrics.inc('chimkins_stock_webhook_skipped_total', len(products) - len(quantities))
+            if not quantities:
+                _logger.info(f"Stock webhook skipped: no change for {len(products)} products")
+                return True
+
+            header = {
                 'timestamp': fields.Datetime.now().isoformat(),
                 'api_key': api_key,
                 'odoo_db': odoo_db,
                 'odoo_url': odoo_url,
                 'operation': 'stock_update',
-                'products': stock_data
             }
 
-            self._send_webhook_async(webhook_url, payload)
+            Snapshot = self.env['stock.webhook.snapshot'].sudo()
+            payloads = self._iter_stock_payloads(quantities, chunk_size, header, per_warehouse=per_warehouse)
+            while True:
+                with metrics.timer('chimkins_stock_payload_build_seconds', stage='payload'):
+                    chunk = next(payloads, None)
+                if chunk is None:
+                    break
+                payload, chunk_quantities = chunk
+                if not self._send_webhook_with_retry(webhook_url, payload):
+                    return False
+                Snapshot._record_acknowledged(webhook_url, chunk_quantities)
+            return True
 
         except Exception as e:
             _logger.error(f"Stock webhook preparation error: {str(e)}")
+            return False
 
     @api.model
-    def _send_webhook_async(self, webhook_url, payload):
-        """Send webhook asynchronously to avoid blocking stock operations"""
-        try:
-            import threading
+    def request_full_stock_snapshot(self, product_ids=None):
+        """RPC for WooCommerce: resend stock for the given products regardless of
+        what was sent before. Without product ids, a full-catalog resync is started."""
+        webhook_url = self.env['ir.config_parameter'].sudo().get_param('webhook_stock_update', default='')
+        if not webhook_url:
+            return {
+                'success': False,
+                'message': "Stock webhook URL is not configured.",
+                'product_count': 0,
+            }
 
-            def send_request():
-                self._send_webhook_with_retry(webhook_url, payload)
+        # Resetting snapshots forces resends for every caller: administrators only
+        Snapshot = self.env['stock.webhook.snapshot']
+        Resync = self.env['stock.webhook.resync']
+        if not Snapshot.check_access_rights('unlink', raise_exception=False) or (
+                product_ids is None and not Resync.check_access_rights('create', raise_exception=False)):
+            return {
+                'success': False,
+                'message': "You are not allowed to request a stock snapshot.",
+                'product_count': 0,
+            }
 
-            thread = threading.Thread(target=send_request)
-            thread.daemon = True
-            thread.start()
+        if product_ids is None:
+            Snapshot.sudo()._reset(webhook_url)
+            return Resync.start_resync()
 
-        except Exception as e:
-            _logger.error(f"Failed to start webhook thread: {str(e)}")
+        products = self.env['product.product'].browse(product_ids).exists()
+        if not products:
+            return {
+                'success': False,
+                'message': "No existing products among the requested ids.",
+                'product_count': 0,
+            }
+        Snapshot.sudo()._reset(webhook_url, product_ids=products.ids)
+        self.env['stock.webhook.outbox']._enqueue(products, 'full_snapshot')
+        _logger.info(f"Full stock snapshot requested for {len(products)} products")
+        return {
+            'success': True,
+            'message': "Full stock snapshot queued.",
+            'product_count': len(products),
+        }
 
 class StockMove(models.Model):
     _inherit = 'stock.move'
@@ -183,23 +337,10 @@ class StockMove(models.Model):
         return result
 
     def _schedule_post_commit_webhook(self, products, operation_type):
-        """Schedule webhook to run after transaction commit with centralized deduplication"""
-        if self.env['stock.quant']._is_webhook_already_scheduled(products, operation_type):
-            _logger.info(f"Skipped duplicate webhook for operation {operation_type}")
-            return
-
-        def send_webhook():
-            try:
-                with self.env.registry.cursor() as new_cr:
-                    new_env = api.Environment(new_cr, self.env.uid, self.env.context)
-                    fresh_products = new_env['product.product'].browse(products.ids)
-                    new_env['stock.quant']._send_stock_webhook(fresh_products)
-            except Exception as e:
-                _logger.error(f"Post-commit webhook error: {str(e)}")
-
-        dedup_key = self.env['stock.quant']._mark_webhook_scheduled(products, operation_type)
-        self.env.cr.postcommit.add(send_webhook)
-        _logger.info(f"Scheduled webhook for operation {operation_type} with key {dedup_key}")
+        """Queue the products in the stock webhook outbox; coalesced and delivered by cron once committed"""
+        metrics.inc('chimkins_stock_webhook_scheduled_total', operation=operation_type)
+        self.env['stock.webhook.outbox']._enqueue(products, operation_type)
+        _logger.info(f"Queued webhook for operation {operation_type} ({len(products)} products)")
 
 
 class SaleOrder(models.Model):
@@ -240,20 +381,7 @@ class SaleOrder(models.Model):
         return result
 
     def _schedule_post_commit_webhook(self, products, operation_type):
-        """Schedule webhook to run after transaction commit with centralized deduplication"""
-        if self.env['stock.quant']._is_webhook_already_scheduled(products, operation_type):
-            _logger.info(f"Skipped duplicate webhook for operation {operation_type}")
-            return
-
-        def send_webhook():
-            try:
-                with self.env.registry.cursor() as new_cr:
-                    new_env = api.Environment(new_cr, self.env.uid, self.env.context)
-                    fresh_products = new_env['product.product'].browse(products.ids)
-                    new_env['stock.quant']._send_stock_webhook(fresh_products)
-            except Exception as e:
-                _logger.error(f"Post-commit webhook error: {str(e)}")
-
-        dedup_key = self.env['stock.quant']._mark_webhook_scheduled(products, operation_type)
-        self.env.cr.postcommit.add(send_webhook)
-        _logger.info(f"Scheduled SO webhook for operation {operation_type} with key {dedup_key}")
+        """Queue the products in the stock webhook outbox; coalesced and delivered by cron once committed"""
+        metrics.inc('chimkins_stock_webhook_scheduled_total', operation=operation_type)
+        self.env['stock.webhook.outbox']._enqueue(products, operation_type)
+        _logger.info(f"Queued SO webhook for operation {operation_type} ({len(products)} products)")
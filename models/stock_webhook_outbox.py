@@ -0,0 +1,154 @@
+# /models/stock_webhook_outbox.py
+
+from datetime import timedelta
+import logging
+
+from odoo import models, fields, api
+
+from .webhook_metrics import metrics
+
+_logger = logging.getLogger(__name__)
+
+
+class StockWebhookOutbox(models.Model):
+    """Stock changes waiting to be pushed to WooCommerce.
+
+    Rows are written in the same transaction as the stock operation that
+    caused them, so a crashed or recycled worker can no longer lose an update:
+    either the move and its outbox row commit together or neither does.
+    The cron drainer delivers pending rows in batches and keeps retry state.
+
+    There is at most one pending row per product (partial unique index), which
+    deduplicates changes across every HTTP and cron worker. A row being
+    delivered moves to ``processing`` under a lease, so changes committed
+    meanwhile queue a fresh pending row instead of being absorbed.
+    """
+    _name = 'stock.webhook.outbox'
+    _inherit = 'webhook.outbox.mixin'
+    _description = 'Stock Webhook Outbox'
+
+    _outbox_cron_xmlid = 'ir_cron_stock_webhook_outbox'
+    _outbox_url_param = 'webhook_stock_update'
+    _outbox_param_prefix = 'webhook_stock_outbox'
+
+    product_id = fields.Many2one('product.product', string='Product', required=True, ondelete='cascade')
+    operation = fields.Char(string='Operation')
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS stock_webhook_outbox_pending_product_uniq
+                ON stock_webhook_outbox (product_id) WHERE state = 'pending'
+        """)
+
+    @api.model
+    def _get_debounce_window(self):
+        """Seconds during which changes to the same products are merged into one send."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        return max(int(ICP.get_param('webhook_stock_debounce_seconds', default=10)), 0)
+
+    @api.model
+    def _enqueue(self, products, operation_type):
+        """Mark products dirty; one batch of outbox rows is written just before commit."""
+        if not products:
+            return
+        if not self._get_outbox_url():
+            return
+
+        dirty = self.env.cr.precommit.data.setdefault('stock_webhook_outbox.dirty', {})
+        if not dirty:
+            self.env.cr.precommit.add(self._flush_dirty)
+        already_dirty = 0
+        for product_id in products.ids:
+            if product_id in dirty:
+                already_dirty += 1
+            else:
+                dirty[product_id] = operation_type
+        metrics.inc('chimkins_stock_webhook_products_scheduled_total', len(products))
+        metrics.inc('chimkins_stock_webhook_deduplicated_total', already_dirty)
+
+    @api.model
+    def _flush_dirty(self):
+        """Write the products collected in this transaction to the outbox.
+
+        Products that already have a pending row are skipped: that row has
+        not been picked up yet, so it will be delivered with this change.
+        """
+        dirty = self.env.cr.precommit.data.pop('stock_webhook_outbox.dirty', {})
+        if not dirty:
+            return
+        next_attempt = fields.Datetime.now() + timedelta(seconds=self._get_debounce_window())
+        self.env.cr.execute("""
+            INSERT INTO stock_webhook_outbox (product_id, operation, state, attempts, next_attempt,
+                                              create_date, write_date, create_uid, write_uid)
+            SELECT v.product_id, v.operation, 'pending', 0, %(next_attempt)s,
+                   now() at time zone 'UTC', now() at time zone 'UTC', %(uid)s, %(uid)s
+              FROM unnest(%(product_ids)s::int[], %(operations)s::varchar[]) AS v(product_id, operation)
+            ON CONFLICT (product_id) WHERE state = 'pending' DO NOTHING
+        """, {
+            'next_attempt': next_attempt,
+            'uid': self.env.uid,
+            'product_ids': list(dirty),
+            'operations': list(dirty.values()),
+        })
+        inserted = self.env.cr.rowcount
+        metrics.inc('chimkins_stock_webhook_deduplicated_total', len(dirty) - inserted)
+        metrics.flush_after_commit(self.env)
+        if inserted:
+            cron = self._get_cron()
+            if cron:
+                cron.sudo()._trigger(at=next_attempt)
+
+    def _deliver(self):
+        """Send one webhook covering every product in these rows."""
+        max_attempts = self._get_outbox_setting('max_attempts', 10)
+        products = self.mapped('product_id')
+        try:
+            delivered = self.env['stock.quant']._send_stock_webhook(products)
+            error = False if delivered else "Webhook endpoint did not acknowledge the update."
+        except Exception as e:
+            _logger.exception(f"Stock outbox delivery error: {e}")
+            delivered, error = False, str(e)
+
+        if delivered:
+            now = fields.Datetime.now()
+            for row in self:
+                metrics.observe('chimkins_stock_sync_lag_seconds', (now - row.create_date).total_seconds())
+            self.write({'state': 'sent', 'sent_date': now, 'last_error': False})
+            _logger.info(f"Stock outbox delivered {len(self)} rows for {len(products)} products")
+            return True
+
+        exhausted = self.filtered(lambda row: row.attempts + 1 >= max_attempts)
+        exhausted.write({'state': 'failed', 'last_error': error})
+        (self - exhausted)._requeue(error)
+        _logger.warning(f"Stock outbox delivery failed for {len(products)} products: {error}")
+        return False
+
+    def _requeue(self, error):
+        """Put failed rows back to pending with exponential backoff, merging
+        them into any pending row queued for the same product meanwhile.
+
+        A batch can hold two rows of one product (an expired lease reclaimed
+        next to a newer pending row); one row per product is kept so the
+        upsert never touches the same row twice."""
+        if not self:
+            return
+        metrics.inc('chimkins_stock_webhook_retried_total', len(self))
+        self.flush_recordset()
+        self.env.cr.execute("""
+            INSERT INTO stock_webhook_outbox (product_id, operation, state, attempts, next_attempt, last_error,
+                                              create_date, write_date, create_uid, write_uid)
+            SELECT DISTINCT ON (product_id)
+                   product_id, operation, 'pending', attempts + 1,
+                   (now() at time zone 'UTC') + LEAST(30 * power(2, attempts), 3600) * interval '1 second',
+                   %(error)s, create_date, now() at time zone 'UTC', create_uid, %(uid)s
+              FROM stock_webhook_outbox
+             WHERE id IN %(ids)s
+             ORDER BY product_id, attempts DESC, create_date
+            ON CONFLICT (product_id) WHERE state = 'pending' DO UPDATE
+               SET attempts = GREATEST(stock_webhook_outbox.attempts, EXCLUDED.attempts),
+                   next_attempt = GREATEST(stock_webhook_outbox.next_attempt, EXCLUDED.next_attempt),
+                   last_error = EXCLUDED.last_error,
+                   write_date = EXCLUDED.write_date
+        """, {'error': error, 'uid': self.env.uid, 'ids': tuple(self.ids)})
+        self.unlink()
+        self.invalidate_model()
@@ -0,0 +1,94 @@
+# /models/stock_webhook_snapshot.py
+
+import logging
+
+from odoo import models, fields, api
+from odoo.tools import float_compare
+
+_logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ('on_hand', 'forecast', 'available')
+
+
+class StockWebhookSnapshot(models.Model):
+    """Last stock figures acknowledged by a WooCommerce endpoint, per product."""
+    _name = 'stock.webhook.snapshot'
+    _description = 'Stock Webhook Snapshot'
+
+    product_id = fields.Many2one('product.product', string='Product', required=True, ondelete='cascade')
+    endpoint = fields.Char(string='Endpoint', required=True)
+    on_hand = fields.Float(string='On Hand')
+    forecast = fields.Float(string='Forecast')
+    available = fields.Float(string='Available')
+
+    _sql_constraints = [
+        ('product_endpoint_unique', 'unique(product_id, endpoint)', 'Only one snapshot per product and endpoint.')
+    ]
+
+    @api.model
+    def _filter_changed(self, endpoint, quantities):
+        """Return the product ids whose quantities differ from the last acknowledged ones."""
+        if not quantities:
+            return []
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT product_id, on_hand, forecast, available
+              FROM stock_webhook_snapshot
+             WHERE endpoint = %s AND product_id IN %s
+        """, (endpoint, tuple(quantities)))
+        last_sent = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        digits = self.env['decimal.precision'].precision_get('Product Unit of Measure')
+
+        changed = []
+        for product_id, qty in quantities.items():
+            previous = last_sent.get(product_id)
+            if previous is None or any(
+                float_compare(qty[name], previous[index], precision_digits=digits)
+                for index, name in enumerate(SNAPSHOT_FIELDS)
+            ):
+                changed.append(product_id)
+        return changed
+
+    @api.model
+    def _record_acknowledged(self, endpoint, quantities):
+        """Upsert the figures an endpoint has just acknowledged."""
+        if not quantities:
+            return
+        product_ids = list(quantities)
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO stock_webhook_snapshot (product_id, endpoint, on_hand, forecast, available,
+                                                create_date, write_date, create_uid, write_uid)
+            SELECT v.product_id, %(endpoint)s, v.on_hand, v.forecast, v.available,
+                   now() at time zone 'UTC', now() at time zone 'UTC', %(uid)s, %(uid)s
+              FROM unnest(%(product_ids)s::int[], %(on_hand)s::float8[],
+                          %(forecast)s::float8[], %(available)s::float8[])
+                   AS v(product_id, on_hand, forecast, available)
+            ON CONFLICT (product_id, endpoint) DO UPDATE
+               SET on_hand = EXCLUDED.on_hand,
+                   forecast = EXCLUDED.forecast,
+                   available = EXCLUDED.available,
+                   write_date = EXCLUDED.write_date,
+                   write_uid = EXCLUDED.write_uid
+        """, {
+            'endpoint': endpoint,
+            'uid': self.env.uid,
+            'product_ids': product_ids,
+            'on_hand': [quantities[pid]['on_hand'] for pid in product_ids],
+            'forecast': [quantities[pid]['forecast'] for pid in product_ids],
+            'available': [quantities[pid]['available'] for pid in product_ids],
+        })
+        self.invalidate_model()
+
+    @api.model
+    def _reset(self, endpoint, product_ids=None):
+        """Forget what an endpoint has seen so the next send is a full snapshot.
+
+        ``product_ids=None`` resets every product; an empty list resets none.
+        """
+        domain = [('endpoint', '=', endpoint)]
+        if product_ids is not None:
+            if not product_ids:
+                return
+            domain.append(('product_id', 'in', product_ids))
+        self.search(domain).unlink()
@@ -0,0 +1,51 @@
+# /models/webhook_dispatcher.py
+
+from urllib.parse import urlsplit
+import gzip
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_sessions = {}
+_sessions_pid = None
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
+    """Keep-alive ``requests.Session`` of this process for the endpoint (scheme + host).
+
+    Reusing it keeps TLS connections open between webhooks. Sessions are
+    recreated after a fork, as sockets must not be shared between workers.
+    """
+    global _sessions_pid
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    with _sessions_lock:
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.mount(f"{parts.scheme}://{parts.netloc}", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            session.headers.update({'Content-Type': 'application/json'})
+            _sessions[key] = session
+    return session
+
+
+def post_webhook(url, payload, timeout=10, headers=None, compress=False):
+    """POST ``payload`` as JSON on the endpoint's shared session, gzipped if ``compress``.
+
+    ``payload`` may also be pre-serialized ``bytes``. The request runs in the
+    caller's thread, so ``timeout`` bounds it and a timed-out request is never
+    still running behind the caller's back.
+    """
+    session = get_session(url)
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    if compress:
+        body = gzip.compress(body)
+        headers = dict(headers or {}, **{'Content-Encoding': 'gzip'})
+    return session.post(url, data=body, timeout=timeout, headers=headers)
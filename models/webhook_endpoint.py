@@ -0,0 +1,168 @@
+# /models/webhook_endpoint.py
+
+from contextlib import contextmanager
+import logging
+import threading
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Breaker cursor of the delivery batch running in this thread, see _batch()
+_local = threading.local()
+
+
+class WebhookEndpoint(models.Model):
+    """Health and circuit breaker state of an outbound webhook URL.
+
+    After ``webhook_circuit_failure_threshold`` consecutive failures the circuit
+    opens and senders stop calling the endpoint; their events stay parked in
+    the database. Once ``webhook_circuit_cooldown_seconds`` have passed, one
+    caller is granted a half-open probe. Its success closes the circuit and
+    parked events flow again; its failure reopens it.
+
+    State is read on the caller's cursor. Changes are written on a separate
+    cursor, so that other workers see them and the caller's transaction holds
+    no lock on the row; a delivery batch shares one such cursor (``_batch``).
+    In tests everything stays on the test cursor.
+    """
+    _name = 'webhook.endpoint'
+    _description = 'Webhook Endpoint Health'
+    _rec_name = 'url'
+
+    url = fields.Char(string='URL', required=True)
+    state = fields.Selection([
+        ('closed', 'Closed'),
+        ('open', 'Open'),
+        ('half_open', 'Half-open'),
+    ], string='Circuit', default='closed', required=True)
+    consecutive_failures = fields.Integer(string='Consecutive Failures', default=0)
+    opened_at = fields.Datetime(string='Opened On')
+    last_failure = fields.Datetime(string='Last Failure')
+    last_error = fields.Text(string='Last Error')
+
+    _sql_constraints = [
+        ('url_unique', 'unique(url)', 'Webhook endpoint URL must be unique.')
+    ]
+
+    @api.model
+    def _get_breaker_settings(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return (
+            max(int(ICP.get_param('webhook_circuit_failure_threshold', default=5)), 1),
+            max(int(ICP.get_param('webhook_circuit_cooldown_seconds', default=60)), 0),
+        )
+
+    @api.model
+    @contextmanager
+    def _batch(self):
+        """Write every breaker change made inside the block on one cursor,
+        committed when the block ends (e.g. one outbox delivery batch)."""
+        if getattr(_local, 'cr', None) is not None or self.env.registry.in_test_mode():
+            yield
+            return
+        with self.env.registry.cursor() as cr:
+            _local.cr = cr
+            try:
+                yield
+            finally:
+                _local.cr = None
+
+    @contextmanager
+    def _state_cursor(self):
+        """Cursor for state changes: the batch cursor, the test cursor in
+        tests, otherwise a short-lived cursor of its own."""
+        cr = getattr(_local, 'cr', None)
+        if cr is not None:
+            yield cr
+        elif self.env.registry.in_test_mode():
+            yield self.env.cr
+        else:
+            with self.env.registry.cursor() as cr:
+                yield cr
+
+    @api.model
+    def _read_state(self, url):
+        # The batch cursor sees the batch's own uncommitted changes
+        # Python clock: SQL now() is frozen at the start of the caller's transaction
+        cr = getattr(_local, 'cr', None) or self.env.cr
+        cr.execute("""
+            SELECT state, consecutive_failures,
+                   opened_at <= %s - %s * interval '1 second'
+              FROM webhook_endpoint WHERE url = %s
+        """, (fields.Datetime.now(), self._get_breaker_settings()[1], url))
+        return cr.fetchone()
+
+    @api.model
+    def _allow_request(self, url):
+        """Whether a sender may call ``url`` now; may grant the half-open probe."""
+        if not url:
+            return False
+        row = self._read_state(url)
+        if not row or row[0] == 'closed':
+            return True
+        if not row[2]:
+            return False
+        cooldown = self._get_breaker_settings()[1]
+        with self._state_cursor() as cr:
+            # Same clock as _read_state, or the test cursor never matches
+            cr.execute("""
+                UPDATE webhook_endpoint
+                   SET state = 'half_open', opened_at = %(now)s, write_date = %(now)s
+                 WHERE url = %(url)s AND state IN ('open', 'half_open')
+                   AND opened_at <= %(now)s - %(cooldown)s * interval '1 second'
+                RETURNING id
+            """, {'url': url, 'now': fields.Datetime.now(), 'cooldown': cooldown})
+            granted = bool(cr.fetchone())
+        if granted:
+            _logger.info(f"Circuit half-open for {url}: sending probe")
+        return granted
+
+    @api.model
+    def _is_open(self, url):
+        """Whether ``url`` is currently refused (a half-open probe may proceed)."""
+        row = self._read_state(url)
+        return bool(row) and row[0] == 'open'
+
+    @api.model
+    def _record_success(self, url):
+        row = self._read_state(url)
+        if not row or (row[0] == 'closed' and not row[1]):
+            return
+        with self._state_cursor() as cr:
+            cr.execute("""
+                UPDATE webhook_endpoint
+                   SET state = 'closed', consecutive_failures = 0, write_date = %s
+                 WHERE url = %s AND (state != 'closed' OR consecutive_failures != 0)
+                RETURNING id
+            """, (fields.Datetime.now(), url))
+            if cr.fetchone():
+                _logger.info(f"Circuit closed for {url}")
+
+    @api.model
+    def _record_failure(self, url, error=None):
+        threshold = self._get_breaker_settings()[0]
+        now = fields.Datetime.now()
+        with self._state_cursor() as cr:
+            cr.execute("""
+                INSERT INTO webhook_endpoint (url, state, consecutive_failures,
+                                              create_date, write_date, create_uid, write_uid)
+                VALUES (%(url)s, 'closed', 0, %(now)s, %(now)s, %(uid)s, %(uid)s)
+                ON CONFLICT (url) DO NOTHING
+            """, {'url': url, 'now': now, 'uid': self.env.uid})
+            cr.execute("""
+                UPDATE webhook_endpoint
+                   SET consecutive_failures = consecutive_failures + 1,
+                       last_failure = %(now)s,
+                       last_error = %(error)s,
+                       opened_at = CASE WHEN state = 'half_open' OR consecutive_failures + 1 >= %(threshold)s
+                                        THEN %(now)s ELSE opened_at END,
+                       state = CASE WHEN state = 'half_open' OR consecutive_failures + 1 >= %(threshold)s
+                                    THEN 'open' ELSE state END,
+                       write_date = %(now)s
+                 WHERE url = %(url)s
+                RETURNING state, consecutive_failures
+            """, {'url': url, 'now': now, 'error': error, 'threshold': threshold})
+            state, failures = cr.fetchone()
+        if state == 'open':
+            _logger.warning(f"Circuit open for {url} after {failures} consecutive failures")
@@ -0,0 +1,187 @@
+# /models/webhook_metrics.py
+
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+from odoo import models, fields
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+
+METRIC_HELP = {
+    'chimkins_stock_webhook_scheduled_total': ('counter', "Stock webhook schedule requests, by operation."),
+    'chimkins_stock_webhook_products_scheduled_total': ('counter', "Products marked dirty for the stock webhook."),
+    'chimkins_stock_webhook_deduplicated_total': ('counter', "Dirty products merged into an already queued update."),
+    'chimkins_stock_webhook_skipped_total': ('counter', "Products not sent because their stock did not change."),
+    'chimkins_webhook_requests_total': ('counter', "Outbound webhook requests, by webhook and result."),
+    'chimkins_stock_webhook_retried_total': ('counter', "Outbox rows rescheduled after a failed delivery."),
+    'chimkins_stock_payload_build_seconds': ('histogram', "Time spent computing stock figures and building payloads."),
+    'chimkins_webhook_request_seconds': ('histogram', "Outbound webhook request latency, by webhook."),
+    'chimkins_stock_sync_lag_seconds': ('histogram', "Time from outbox row commit to WooCommerce acknowledgement."),
+}
+
+
+class MetricsRegistry(object):
+    """Counters and histograms of the sync pipeline, summed over all workers.
+
+    Deliveries run in cron worker processes that never answer HTTP, so each
+    process only accumulates increments in memory and ``flush`` adds them to
+    the ``webhook.metric`` table, which the scrape endpoint renders. Values
+    are therefore cumulative across workers and restarts. Increments a
+    process made since its last flush are lost if it exits.
+    """
+
+    # Minimum seconds between two flushes triggered by ``flush_after_commit``
+    FLUSH_INTERVAL = 10
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = 0.0
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+
+    def _take_series(self):
+        """Return the pending increments as ``(name, suffix, labels, le, value)``
+        rows and clear them. A histogram is stored as its bucket, sum and count
+        series, which are plain counters too."""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            histograms, self._histograms = self._histograms, {}
+
+        rows = []
+        for (name, labels), value in counters.items():
+            rows.append((name, '', format_label_pairs(labels), 0.0, value))
+        for (name, labels), histogram in histograms.items():
+            pairs = format_label_pairs(labels)
+            for bound, count in zip(self.buckets, histogram['buckets']):
+                rows.append((name, '_bucket', pairs, float(bound), count))
+            rows.append((name, '_bucket', pairs, float('inf'), histogram['count']))
+            rows.append((name, '_sum', pairs, 0.0, histogram['sum']))
+            rows.append((name, '_count', pairs, 0.0, histogram['count']))
+        # One order for every worker, so that concurrent flushes cannot deadlock
+        return sorted(rows)
+
+    def flush(self, cr):
+        """Add the increments of this process to the shared totals on ``cr``."""
+        self._last_flush = time.monotonic()
+        rows = self._take_series()
+        if not rows:
+            return
+        names, suffixes, labels, les, values = zip(*rows)
+        cr.execute("""
+            INSERT INTO webhook_metric (name, suffix, labels, le, value)
+            SELECT * FROM unnest(%s::varchar[], %s::varchar[], %s::varchar[], %s::float8[], %s::float8[])
+            ON CONFLICT (name, suffix, labels, le) DO UPDATE
+               SET value = webhook_metric.value + EXCLUDED.value
+        """, (list(names), list(suffixes), list(labels), list(les), list(values)))
+
+    def flush_after_commit(self, env, force=False):
+        """Flush on a cursor of its own once the current transaction commits.
+
+        Unless ``force`` is set, a process flushes at most every
+        ``FLUSH_INTERVAL`` seconds, so that busy workers do not all update
+        the same rows on every commit. Test cursors never commit: nothing is
+        flushed in tests.
+        """
+        cr = env.cr
+        if env.registry.in_test_mode() or 'webhook_metrics.flush' in cr.postcommit.data:
+            return
+        if not force and time.monotonic() - self._last_flush < self.FLUSH_INTERVAL:
+            return
+        cr.postcommit.data['webhook_metrics.flush'] = True
+        registry = env.registry
+
+        @cr.postcommit.add
+        def flush():
+            try:
+                with registry.cursor() as flush_cr:
+                    self.flush(flush_cr)
+            except Exception:
+                _logger.exception("Could not flush webhook metrics")
+
+    def render(self, cr):
+        """Prometheus text exposition of the totals flushed by every worker."""
+        cr.execute("SELECT name, suffix, labels, le, value FROM webhook_metric ORDER BY name, labels, suffix, le")
+        series = {}
+        for name, suffix, labels, le, value in cr.fetchall():
+            series.setdefault(name, []).append((suffix, labels, le, value))
+
+        lines = []
+        for name, (metric_type, help_text) in METRIC_HELP.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, le, value in series.get(name, []):
+                if suffix == '_bucket':
+                    bound = '+Inf' if le == float('inf') else repr(le)
+                    labels = ','.join(filter(None, [labels, format_label_pairs((('le', bound),))]))
+                lines.append(f"{name}{suffix}{'{' + labels + '}' if labels else ''} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class WebhookMetric(models.Model):
+    """Running total of one metric series, see MetricsRegistry."""
+    _name = 'webhook.metric'
+    _description = 'Webhook Metric Total'
+    _log_access = False
+
+    name = fields.Char(string='Metric', required=True)
+    suffix = fields.Char(string='Series Suffix', required=True, default='')
+    labels = fields.Char(string='Labels', required=True, default='')
+    le = fields.Float(string='Bucket Upper Bound', required=True, default=0.0)
+    value = fields.Float(string='Value', default=0.0)
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS webhook_metric_series_uniq
+                ON webhook_metric (name, suffix, labels, le)
+        """)
+
+
+def format_label_pairs(labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + format_label_pairs(labels) + '}'
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,131 @@
+# /models/webhook_outbox_mixin.py
+
+from datetime import timedelta
+import threading
+
+from odoo import models, fields, api
+
+from .webhook_metrics import metrics
+
+
+def lease_due_rows(cr, table, where, limit, lease, state=None):
+    """Lease up to ``limit`` due rows of ``table`` matching ``where`` and
+    return their ids, skipping rows locked by another worker.
+
+    A leased row's ``next_attempt`` moves ``lease`` seconds ahead (and its
+    state to ``state`` if given), so a row left behind by a crashed worker
+    becomes due again once the lease expires. Due dates are compared with
+    the same clock that computed them, not with SQL now(), which stays
+    frozen at the start of the transaction.
+    """
+    cr.execute(f"""
+        UPDATE {table}
+           SET {'state = %(state)s,' if state else ''}
+               next_attempt = %(now)s + %(lease)s * interval '1 second',
+               write_date = %(now)s
+         WHERE id IN (
+            SELECT id FROM {table}
+             WHERE {where} AND next_attempt <= %(now)s
+             ORDER BY id
+             LIMIT %(limit)s
+             FOR UPDATE SKIP LOCKED
+         )
+        RETURNING id
+    """, {'now': fields.Datetime.now(), 'lease': lease, 'limit': limit, 'state': state})
+    return [row[0] for row in cr.fetchall()]
+
+
+class WebhookOutboxMixin(models.AbstractModel):
+    """Rows waiting to be delivered to a webhook by a cron drainer.
+
+    The drainer claims due rows in batches under a lease (``processing``),
+    commits the claim, delivers the batch and commits again, until nothing
+    is due or the endpoint's circuit is open. Models set the cron xmlid, the
+    system parameter holding the webhook URL and the prefix of their
+    ``<prefix>_lease_seconds`` (600), ``<prefix>_batch_size`` (500) and
+    ``<prefix>_max_attempts`` (10) parameters, and implement ``_deliver``.
+    """
+    _name = 'webhook.outbox.mixin'
+    _description = 'Webhook Outbox'
+    _order = 'id'
+
+    _outbox_cron_xmlid = None
+    _outbox_url_param = None
+    _outbox_param_prefix = None
+
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='State', default='pending', required=True, index=True)
+    attempts = fields.Integer(string='Attempts', default=0)
+    next_attempt = fields.Datetime(string='Next Attempt', default=fields.Datetime.now, index=True)
+    sent_date = fields.Datetime(string='Sent On')
+    last_error = fields.Text(string='Last Error')
+
+    @api.model
+    def _get_cron(self):
+        return self.env.ref(f'{self._module}.{self._outbox_cron_xmlid}', raise_if_not_found=False)
+
+    @api.model
+    def _get_outbox_setting(self, name, default):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return int(ICP.get_param(f'{self._outbox_param_prefix}_{name}', default=default))
+
+    @api.model
+    def _get_outbox_url(self):
+        return self.env['ir.config_parameter'].sudo().get_param(self._outbox_url_param, default='')
+
+    @api.model
+    def _check_outbox_config(self, url):
+        """Whether the drainer may run; rows stay queued otherwise."""
+        return bool(url)
+
+    @api.model
+    def _claim_pending(self, limit):
+        """Move a batch of due rows to ``processing``; rows of a crashed
+        worker are claimed again once their lease expires."""
+        ids = lease_due_rows(
+            self.env.cr, self._table, "state IN ('pending', 'processing')", limit,
+            self._get_outbox_setting('lease_seconds', 600), state='processing',
+        )
+        self.invalidate_model(['state', 'next_attempt'])
+        return self.browse(ids)
+
+    @api.model
+    def _cron_process_outbox(self):
+        """Deliver due rows in batches until the queue is drained."""
+        url = self._get_outbox_url()
+        if not self._check_outbox_config(url):
+            return
+        batch_size = self._get_outbox_setting('batch_size', 500)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        Endpoint = self.env['webhook.endpoint'].sudo()
+
+        while True:
+            # While the circuit is open, rows stay queued as they are
+            if not Endpoint._allow_request(url):
+                break
+            rows = self._claim_pending(batch_size)
+            if not rows:
+                break
+            if auto_commit:
+                self.env.cr.commit()
+            with Endpoint._batch():
+                rows._deliver()
+            if not auto_commit:
+                break
+            metrics.flush_after_commit(self.env, force=True)
+            self.env.cr.commit()
+
+    def _deliver(self):
+        raise NotImplementedError()
+
+    @api.autovacuum
+    def _gc_sent_rows(self):
+        """Drop delivered rows after a week; failed ones are kept for inspection."""
+        if self._abstract:
+            return
+        limit_date = fields.Datetime.now() - timedelta(days=7)
+        self.search([('state', '=', 'sent'), ('sent_date', '<', limit_date)]).unlink()
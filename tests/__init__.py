@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from . import test_stock_webhook_benchmark
+from . import test_query_counts
+from . import test_stock_webhook_outbox
@@ -0,0 +1,296 @@
+# /tests/test_query_counts.py
+
+from unittest.mock import patch
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+
+from ..models.hold_state import StockPicking as HoldStatePicking
+from ..models.stock_move import StockPicking as WooCommercePicking
+from ..models.stock_update import StockMove as WebhookStockMove
+from ..models.stock_update import SaleOrder as WebhookSaleOrder
+
+SIZES = (1, 10, 100)
+# Queries an override may add on top of its 1-record cost at 100 records
+SLACK = 2
+
+
+@tagged('post_install', '-at_install')
+class TestOverrideQueryCounts(AccountTestInvoicingCommon):
+    """The queries each hot override adds on top of core must not grow with
+    the number of records it processes.
+
+    An override's cost is the query count of a call minus that of the same
+    call on the next class in the MRO (``super(OverrideClass, records)``),
+    measured on identical fresh data for 1, 10 and 100 records.
+    """
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('webhook_stock_update', 'http://127.0.0.1:9/stock')
+        ICP.set_param('webhook_change_status', 'http://127.0.0.1:9/status')
+        ICP.set_param('webhook_api_key', 'test')
+
+        cls.warehouse = cls.env['stock.warehouse'].search([('company_id', '=', cls.env.company.id)], limit=1)
+        cls.stock_location = cls.warehouse.lot_stock_id
+        cls.supplier_location = cls.env.ref('stock.stock_location_suppliers')
+        cls.customer_location = cls.env.ref('stock.stock_location_customers')
+        cls.products = cls.env['product.product'].create([{
+            'name': f'Query Count Product {index}',
+            'type': 'product',
+            'sale_ok': True,
+            'invoice_policy': 'order',
+        } for index in range(5)])
+        for product in cls.products:
+            cls.env['stock.quant']._update_available_quantity(product, cls.stock_location, 100000)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _count_queries(self, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        start = self.cr.sql_log_count
+        func()
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+        return self.cr.sql_log_count - start
+
+    def _assert_override_constant(self, name, make_records, call_override, call_core):
+        overhead = {}
+        call_override(make_records(1))  # warm up registry-level caches
+        for size in SIZES:
+            records = make_records(size)
+            with_override = self._count_queries(lambda: call_override(records))
+            records = make_records(size)
+            without_override = self._count_queries(lambda: call_core(records))
+            overhead[size] = with_override - without_override
+        self.assertLessEqual(
+            overhead[SIZES[-1]], overhead[SIZES[0]] + SLACK,
+            f"{name} adds queries per record: {overhead}",
+        )
+
+    def _assert_constant(self, name, make_records, call):
+        counts = {}
+        call(make_records(1))
+        for size in SIZES:
+            records = make_records(size)
+            counts[size] = self._count_queries(lambda: call(records))
+        self.assertLessEqual(
+            counts[SIZES[-1]], counts[SIZES[0]] + SLACK,
+            f"{name} runs queries per record: {counts}",
+        )
+
+    def _product(self, index):
+        return self.products[index % len(self.products)]
+
+    def _set_quantity_done(self, moves):
+        for move in moves:
+            if 'quantity_done' in move._fields:
+                move.quantity_done = move.product_uom_qty
+            else:
+                move.quantity = move.product_uom_qty
+                move.picked = True
+
+    def _make_moves(self, size, location, location_dest):
+        moves = self.env['stock.move'].create([{
+            'name': f'Query count move {index}',
+            'product_id': self._product(index).id,
+            'product_uom': self._product(index).uom_id.id,
+            'product_uom_qty': 1,
+            'location_id': location.id,
+            'location_dest_id': location_dest.id,
+        } for index in range(size)])
+        moves._action_confirm()
+        return moves
+
+    def _make_orders(self, size, confirm=False):
+        orders = self.env['sale.order'].create([{
+            'partner_id': self.partner_a.id,
+            'warehouse_id': self.warehouse.id,
+            'order_line': [(0, 0, {'product_id': self._product(index).id, 'product_uom_qty': 1})],
+        } for index in range(size)])
+        if confirm:
+            orders.action_confirm()
+        return orders
+
+    def _make_deliveries(self, size):
+        orders = self._make_orders(size, confirm=True)
+        for index, order in enumerate(orders):
+            order.picking_ids.woocommerce_order_id = f'wc-{order.id}-{index}'
+        pickings = orders.picking_ids
+        pickings.action_assign()
+        self._set_quantity_done(pickings.move_ids)
+        return pickings
+
+    # ------------------------------------------------------------------
+    # stock.move
+    # ------------------------------------------------------------------
+
+    def test_stock_move_action_done(self):
+        def make_records(size):
+            moves = self._make_moves(size, self.supplier_location, self.stock_location)
+            moves._action_assign()
+            self._set_quantity_done(moves)
+            return moves
+        self._assert_override_constant(
+            'StockMove._action_done', make_records,
+            lambda moves: moves._action_done(),
+            lambda moves: super(WebhookStockMove, moves)._action_done(),
+        )
+
+    def test_stock_move_action_assign(self):
+        self._assert_override_constant(
+            'StockMove._action_assign',
+            lambda size: self._make_moves(size, self.stock_location, self.customer_location),
+            lambda moves: moves._action_assign(),
+            lambda moves: super(WebhookStockMove, moves)._action_assign(),
+        )
+
+    def test_stock_move_action_cancel(self):
+        self._assert_override_constant(
+            'StockMove._action_cancel',
+            lambda size: self._make_moves(size, self.stock_location, self.customer_location),
+            lambda moves: moves._action_cancel(),
+            lambda moves: super(WebhookStockMove, moves)._action_cancel(),
+        )
+
+    # ------------------------------------------------------------------
+    # sale.order
+    # ------------------------------------------------------------------
+
+    def test_sale_order_action_confirm(self):
+        self._assert_override_constant(
+            'SaleOrder.action_confirm',
+            lambda size: self._make_orders(size),
+            lambda orders: orders.action_confirm(),
+            lambda orders: super(WebhookSaleOrder, orders.with_context(skip_stock_webhook=True)).action_confirm(),
+        )
+
+    def test_sale_order_action_cancel(self):
+        self._assert_override_constant(
+            'SaleOrder.action_cancel',
+            lambda size: self._make_orders(size, confirm=True),
+            lambda orders: orders.with_context(disable_cancel_warning=True).action_cancel(),
+            lambda orders: super(WebhookSaleOrder, orders.with_context(
+                skip_stock_webhook=True, disable_cancel_warning=True)).action_cancel(),
+        )
+
+    # ------------------------------------------------------------------
+    # stock.picking
+    # ------------------------------------------------------------------
+
+    def test_stock_picking_create(self):
+        def make_records(size):
+            orders = self.env['sale.order'].create([{
+                'partner_id': self.partner_a.id,
+                'woocommerce_order_id': f'wc-create-{self.env["sale.order"].search_count([])}-{index}',
+            } for index in range(size)])
+            return [{
+                'picking_type_id': self.warehouse.out_type_id.id,
+                'location_id': self.stock_location.id,
+                'location_dest_id': self.customer_location.id,
+                'origin': order.name,
+                'move_ids': [(0, 0, {
+                    'name': 'Delivery',
+                    'product_id': self._product(index).id,
+                    'product_uom': self._product(index).uom_id.id,
+                    'product_uom_qty': 1,
+                    'location_id': self.stock_location.id,
+                    'location_dest_id': self.customer_location.id,
+                })],
+            } for index, order in enumerate(orders)]
+        self._assert_override_constant(
+            'StockPicking.create', make_records,
+            lambda vals_list: self.env['stock.picking'].create(vals_list),
+            lambda vals_list: super(WooCommercePicking, self.env['stock.picking']).create(vals_list),
+        )
+
+    def test_stock_picking_button_validate(self):
+        self._assert_override_constant(
+            'StockPicking.button_validate', self._make_deliveries,
+            lambda pickings: pickings.button_validate(),
+            lambda pickings: super(WooCommercePicking, pickings).button_validate(),
+        )
+
+    def test_check_and_send_webhook(self):
+        def make_records(size):
+            pickings = self._make_deliveries(size)
+            pickings._action_done()
+            pickings.woocommerce_webhook_sent = False
+            return pickings
+        self._assert_constant(
+            'StockPicking._check_and_send_webhook', make_records,
+            lambda pickings: pickings._check_and_send_webhook(),
+        )
+
+    def test_stock_picking_action_done_receipt(self):
+        def make_records(size):
+            pickings = self.env['stock.picking'].create([{
+                'picking_type_id': self.warehouse.in_type_id.id,
+                'location_id': self.supplier_location.id,
+                'location_dest_id': self.stock_location.id,
+                'origin': f'P{index:05d}',
+                'move_ids': [(0, 0, {
+                    'name': 'Receipt',
+                    'product_id': self._product(index).id,
+                    'product_uom': self._product(index).uom_id.id,
+                    'product_uom_qty': 1,
+                    'location_id': self.supplier_location.id,
+                    'location_dest_id': self.stock_location.id,
+                })],
+            } for index in range(size)])
+            pickings.action_confirm()
+            pickings.action_assign()
+            self._set_quantity_done(pickings.move_ids)
+            return pickings
+        self._assert_override_constant(
+            'StockPicking._action_done', make_records,
+            lambda pickings: pickings._action_done(),
+            lambda pickings: super(HoldStatePicking, pickings)._action_done(),
+        )
+
+    def test_assign_deliveries_for_paid_so(self):
+        product = self.products[0]
+
+        def make_records(size):
+            orders = self.env['sale.order'].create([{
+                'partner_id': self.partner_a.id,
+                'warehouse_id': self.warehouse.id,
+                'order_line': [(0, 0, {'product_id': product.id, 'product_uom_qty': 1})],
+            } for _index in range(size)])
+            orders.action_confirm()
+            orders.picking_ids.do_unreserve()
+            invoices = orders._create_invoices()
+            invoices.action_post()
+            invoices.write({'payment_state': 'paid'})
+
+            receipt = self.env['stock.picking'].create({
+                'picking_type_id': self.warehouse.in_type_id.id,
+                'location_id': self.supplier_location.id,
+                'location_dest_id': self.stock_location.id,
+                'origin': 'P00001',
+                'move_ids': [(0, 0, {
+                    'name': 'Receipt',
+                    'product_id': product.id,
+                    'product_uom': product.uom_id.id,
+                    'product_uom_qty': 1,
+                    'location_id': self.supplier_location.id,
+                    'location_dest_id': self.stock_location.id,
+                })],
+            })
+            receipt.action_confirm()
+            receipt.action_assign()
+            self._set_quantity_done(receipt.move_ids)
+            receipt._action_done()
+            return receipt
+
+        # Core reservation cost is excluded: it is measured by the override tests above
+        with patch.object(type(self.env['stock.picking']), 'action_assign', return_value=True):
+            self._assert_constant(
+                'StockPicking.assign_deliveries_for_paid_so_self', make_records,
+                lambda receipt: receipt.assign_deliveries_for_paid_so_self(),
+            )
@@ -0,0 +1,259 @@
+# /tests/test_stock_webhook_benchmark.py
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+from odoo import fields
+from odoo.tests import tagged, TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+class WooCommerceStubHandler(BaseHTTPRequestHandler):
+    """Accepts every webhook and records when it arrived and what it carried."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        payload = json.loads(body or b'{}')
+        product_ids = {product['product_id'] for product in payload.get('products', [])}
+        with self.server.lock:
+            self.server.arrivals.append((time.monotonic(), product_ids))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"success": true}')
+
+    def log_message(self, *args):
+        pass
+
+
+class WooCommerceStubServer(ThreadingHTTPServer):
+    """Local stub of the shop; keeps track of its own handler threads."""
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.arrivals = []
+        self.lock = threading.Lock()
+        self.handler_threads = set()
+
+    def process_request_thread(self, request, client_address):
+        thread = threading.current_thread()
+        with self.lock:
+            self.handler_threads.add(thread)
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self.lock:
+                self.handler_threads.discard(thread)
+
+
+class ThreadSampler(threading.Thread):
+    """Samples the peak number of threads started while it runs, leaving out
+    itself, the threads alive when it was created and the stub's handlers."""
+
+    def __init__(self, server, interval=0.01):
+        super().__init__(daemon=True)
+        self.server = server
+        self.interval = interval
+        self.baseline = set(threading.enumerate())
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def _count(self):
+        with self.server.lock:
+            ignored = self.baseline | self.server.handler_threads | {self}
+        return sum(1 for thread in threading.enumerate() if thread not in ignored)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, self._count())
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(round(fraction * (len(values) - 1))), len(values) - 1)]
+
+
+@tagged('-standard', 'chimkins_benchmark', 'post_install', '-at_install')
+class TestStockWebhookBenchmark(TransactionCase):
+    """Stock webhook throughput through the real stock overrides.
+
+    Opt-in: run with ``--test-tags chimkins_benchmark``. The number of events
+    per scenario is set by the CHIMKINS_BENCH_EVENTS environment variable
+    (default 50). Each "commit" is simulated by flushing and running the
+    precommit hooks, then the outbox cron delivers to a local stub before
+    the next event runs, so latency is that of one event through the
+    pipeline. Throughput only counts the time spent in the events.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = WooCommerceStubServer(('127.0.0.1', 0), WooCommerceStubHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('webhook_stock_update', f'http://127.0.0.1:{cls.server.server_port}/stock')
+        ICP.set_param('webhook_api_key', 'benchmark')
+        ICP.set_param('webhook_stock_debounce_seconds', 0)
+
+        cls.event_count = int(os.environ.get('CHIMKINS_BENCH_EVENTS', 50))
+        cls.warehouse = cls.env['stock.warehouse'].search([('company_id', '=', cls.env.company.id)], limit=1)
+        cls.partner = cls.env['res.partner'].create({'name': 'Benchmark Customer'})
+        cls.products = cls.env['product.product'].create([{
+            'name': f'Benchmark Product {index}',
+            'default_code': f'BENCH-{index}',
+            'type': 'product',
+            'sale_ok': True,
+        } for index in range(20)])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def _commit(self):
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+        return time.monotonic()
+
+    def _drain_outbox(self):
+        Outbox = self.env['stock.webhook.outbox']
+        due = [('state', '=', 'pending'), ('next_attempt', '<=', fields.Datetime.now())]
+        while Outbox.search_count(due):
+            Outbox._cron_process_outbox()
+            due[1] = ('next_attempt', '<=', fields.Datetime.now())
+
+    def _receive(self, product, quantity):
+        self.env['stock.quant'].with_context(inventory_mode=True).create({
+            'product_id': product.id,
+            'location_id': self.warehouse.lot_stock_id.id,
+            'inventory_quantity': quantity,
+        }).action_apply_inventory()
+
+    def _create_order(self, product, quantity=1):
+        return self.env['sale.order'].create({
+            'partner_id': self.partner.id,
+            'warehouse_id': self.warehouse.id,
+            'order_line': [(0, 0, {'product_id': product.id, 'product_uom_qty': quantity})],
+        })
+
+    def _run_scenario(self, name, events):
+        """Run ``events`` (callables returning the touched products), delivering
+        after each one, and report throughput, webhooks per event,
+        commit-to-delivery latency and the peak of threads the pipeline started."""
+        with self.server.lock:
+            self.server.arrivals.clear()
+        sampler = ThreadSampler(self.server)
+        sampler.start()
+
+        committed = []
+        event_time = 0.0
+        start = time.monotonic()
+        for event in events:
+            event_start = time.monotonic()
+            products = event()
+            committed_at = self._commit()
+            event_time += committed_at - event_start
+            committed.append((committed_at, set(products.ids)))
+            self._drain_outbox()
+        total_time = time.monotonic() - start
+        sampler.stop()
+
+        with self.server.lock:
+            arrivals = list(self.server.arrivals)
+        latencies = []
+        for committed_at, product_ids in committed:
+            delivered = [at for at, ids in arrivals if at >= committed_at and ids & product_ids]
+            if delivered:
+                latencies.append(min(delivered) - committed_at)
+
+        report = {
+            'scenario': name,
+            'events': len(committed),
+            'events_per_sec': round(len(committed) / event_time, 1) if event_time else 0.0,
+            'webhooks_sent': len(arrivals),
+            'webhooks_per_event': round(len(arrivals) / len(committed), 3) if committed else 0.0,
+            'latency_p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+            'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+            'peak_pipeline_threads': sampler.peak,
+            'total_seconds': round(total_time, 3),
+        }
+        _logger.info("Stock webhook benchmark: %s", json.dumps(report))
+        self.assertTrue(arrivals, f"{name}: no webhook reached the stub")
+        return report
+
+    def _product(self, index):
+        return self.products[index % len(self.products)]
+
+    def test_benchmark_receipts(self):
+        def receipt(index):
+            def event():
+                product = self._product(index)
+                self._receive(product, 100 + index)
+                return product
+            return event
+        self._run_scenario('receipts', [receipt(i) for i in range(self.event_count)])
+
+    def test_benchmark_so_confirmations(self):
+        for product in self.products:
+            self._receive(product, 10 * self.event_count)
+        self._commit()
+        self._drain_outbox()
+        orders = [self._create_order(self._product(i)) for i in range(self.event_count)]
+
+        def confirm(order):
+            def event():
+                order.action_confirm()
+                return order.order_line.product_id
+            return event
+        self._run_scenario('so_confirmations', [confirm(order) for order in orders])
+
+    def test_benchmark_reservations(self):
+        orders = [self._create_order(self._product(i)) for i in range(self.event_count)]
+        for order in orders:
+            order.action_confirm()
+        for product in self.products:
+            self._receive(product, 10 * self.event_count)
+        self._commit()
+        self._drain_outbox()
+
+        def reserve(order):
+            def event():
+                order.picking_ids.action_assign()
+                return order.order_line.product_id
+            return event
+        self._run_scenario('reservations', [reserve(order) for order in orders])
+
+    def test_benchmark_cancellations(self):
+        for product in self.products:
+            self._receive(product, 10 * self.event_count)
+        orders = [self._create_order(self._product(i)) for i in range(self.event_count)]
+        for order in orders:
+            order.action_confirm()
+        self._commit()
+        self._drain_outbox()
+
+        def cancel(order):
+            def event():
+                order.with_context(disable_cancel_warning=True).action_cancel()
+                return order.order_line.product_id
+            return event
+        self._run_scenario('cancellations', [cancel(order) for order in orders])
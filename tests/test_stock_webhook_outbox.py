@@ -0,0 +1,104 @@
+# /tests/test_stock_webhook_outbox.py
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import tagged, TransactionCase
+
+
+@tagged('post_install', '-at_install')
+class TestStockWebhookOutbox(TransactionCase):
+    """Enqueue, claim, delivery and requeue of stock.webhook.outbox rows,
+    which are written with raw SQL against its partial unique index."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('webhook_stock_update', 'http://127.0.0.1:9/stock')
+        ICP.set_param('webhook_api_key', 'test')
+        ICP.set_param('webhook_stock_debounce_seconds', 0)
+        ICP.set_param('webhook_stock_outbox_max_attempts', 10)
+        cls.Outbox = cls.env['stock.webhook.outbox']
+        cls.product = cls.env['product.product'].create({'name': 'Outbox Product', 'type': 'product'})
+        cls.other_product = cls.env['product.product'].create({'name': 'Other Outbox Product', 'type': 'product'})
+        cls.products = cls.product | cls.other_product
+
+    def setUp(self):
+        super().setUp()
+        self.Outbox.search([]).unlink()
+
+    def _enqueue(self, products):
+        self.Outbox._enqueue(products, 'test')
+        self.env.cr.precommit.run()
+
+    def _rows(self, state=None):
+        domain = [('product_id', 'in', self.products.ids)]
+        if state:
+            domain.append(('state', '=', state))
+        return self.Outbox.search(domain)
+
+    def _expire(self, rows):
+        rows.write({'next_attempt': fields.Datetime.now() - timedelta(seconds=1)})
+        rows.flush_recordset()
+
+    def _deliver(self, rows, acknowledged):
+        with patch.object(type(self.env['stock.quant']), '_send_stock_webhook', return_value=acknowledged):
+            return rows._deliver()
+
+    def test_enqueue_keeps_one_pending_row_per_product(self):
+        self._enqueue(self.products)
+        self._enqueue(self.product)
+        self.assertEqual(len(self._rows('pending')), 2)
+        self.assertEqual(self._rows('pending').product_id, self.products)
+
+    def test_change_during_delivery_queues_a_new_row(self):
+        self._enqueue(self.product)
+        claimed = self.Outbox._claim_pending(100)
+        self.assertEqual(claimed.mapped('state'), ['processing'])
+        self._enqueue(self.product)
+        self.assertEqual(len(self._rows('pending')), 1)
+        self.assertEqual(len(self._rows('processing')), 1)
+
+    def test_failed_delivery_merges_reclaimed_and_pending_rows(self):
+        # A row whose lease expired is claimed again next to a newer pending
+        # row of the same product, and a third row is queued meanwhile
+        self._enqueue(self.products)
+        stale = self.Outbox._claim_pending(100)
+        self._expire(stale)
+        self._enqueue(self.product)
+        self._expire(self._rows('pending'))
+        claimed = self.Outbox._claim_pending(100)
+        self.assertEqual(len(claimed), 3)
+        self.assertLess(stale, claimed)
+        self._enqueue(self.product)
+        queued = self._rows('pending')
+        self.assertEqual(len(queued), 1)
+
+        self.assertFalse(self._deliver(claimed, acknowledged=False))
+
+        self.assertFalse(claimed.exists())
+        pending = self._rows('pending')
+        self.assertEqual(pending.product_id, self.products)
+        self.assertEqual(len(pending), 2)
+        self.assertIn(queued, pending)
+        self.assertEqual(set(pending.mapped('attempts')), {1})
+        self.assertTrue(all(pending.mapped('last_error')))
+        self.assertFalse(self._rows('processing'))
+
+    def test_exhausted_rows_are_failed(self):
+        self.env['ir.config_parameter'].sudo().set_param('webhook_stock_outbox_max_attempts', 1)
+        self._enqueue(self.product)
+        claimed = self.Outbox._claim_pending(100)
+        self.assertFalse(self._deliver(claimed, acknowledged=False))
+        self.assertEqual(claimed.mapped('state'), ['failed'])
+        self.assertFalse(self._rows('pending'))
+
+    def test_successful_delivery_marks_rows_sent(self):
+        self._enqueue(self.products)
+        claimed = self.Outbox._claim_pending(100)
+        self.assertTrue(self._deliver(claimed, acknowledged=True))
+        self.assertEqual(set(claimed.mapped('state')), {'sent'})
+        self.assertTrue(all(claimed.mapped('sent_date')))
+        self.assertFalse(self.Outbox._claim_pending(100))